@@ -0,0 +1,20 @@
+import numpy as np
+
+from turbine_design import turbine_GPR
+
+
+def test_float32_prediction_error_bound():
+    model = turbine_GPR("eta_lost_model_phi_psi_M2_Co")
+    variables = sorted(model.variables)
+    lower = [model.limit_dict[v][0] for v in variables]
+    upper = [model.limit_dict[v][1] for v in variables]
+
+    rng = np.random.RandomState(0)
+    X = rng.uniform(lower, upper, (2000, len(variables)))
+
+    mean64, std64 = model.predict_array(X, return_std=True)
+    mean32, std32 = model.predict_array(X, return_std=True, dtype=np.float32)
+
+    output_range = np.ptp(np.asarray(model.output_array_train, dtype=float))
+    assert np.max(np.abs(mean32 - mean64)) < 1e-2 * output_range
+    assert np.max(np.abs(std32 - std64)) < 1e-2 * output_range
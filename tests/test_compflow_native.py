@@ -0,0 +1,25 @@
+import numpy as np
+
+from turbine_design.turbigen import compflow_native as cf
+from turbine_design.turbigen import mean_line_stage
+
+
+def test_to_Ma_nonphysical_point():
+    # V_cpTo tends to sqrt(2) as Ma tends to infinity, so 1.6 has no solution
+    Ma = cf.to_Ma("V_cpTo", [0.5, 0.6, 1.6], 1.33)
+    assert np.all(np.isfinite(Ma[:2]))
+    assert np.isnan(Ma[2])
+    np.testing.assert_allclose(
+        cf.from_Ma("V_cpTo", Ma[:2], 1.33), [0.5, 0.6], rtol=1e-10
+    )
+
+
+def test_nondim_stage_from_Lam_sweep():
+    rng = np.random.RandomState(0)
+    lower = [0.4, 0.8, 0.4, 0.5]
+    upper = [1.2, 2.4, 0.6, 0.95]
+    for phi, psi, Lam, Ma2 in rng.uniform(lower, upper, (200, 4)):
+        stg = mean_line_stage.nondim_stage_from_Lam(
+            phi, psi, Lam, 0.0, Ma2, 1.33, 0.9
+        )
+        assert np.isfinite(stg.Lam)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from turbine_design.turbigen import geometry
+
+
+def _exhaustive_solve_ER(npts, dwall):
+    # The original scan, trying every expansion ratio in turn
+    ER = 1.001
+    for _ in range(10000):
+        try:
+            return geometry.cluster_wall(npts, ER, dwall)
+        except Exception:
+            ER += 0.0001
+
+
+def test_cluster_wall_solve_ER_matches_exhaustive_scan():
+    for npts, dwall in [(149, 0.001), (65, 0.002), (33, 0.01), (97, 0.005)]:
+        y = geometry.cluster_wall_solve_ER(npts, dwall)
+        y_exhaustive = _exhaustive_solve_ER(npts, dwall)
+        if y_exhaustive is None:
+            assert y is None
+        else:
+            np.testing.assert_array_equal(y, y_exhaustive)
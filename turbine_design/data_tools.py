@@ -1,16 +1,332 @@
 import os
+import json
+import hashlib
+import numpy as np
 import pandas as pd
 import sys
 import pkg_resources
 from pathlib import Path
 from random import randint
 
+data_columns = ["phi",
+                "psi", 
+                "Lambda", 
+                "M2", 
+                "Co", 
+                "eta_lost",
+                "runid",
+                'Yp_stator', 
+                'Yp_rotor', 
+                'zeta_stator',
+                'zeta_rotor',
+                's_cx_stator',
+                's_cx_rotor',
+                'AR_stator',
+                'AR_rotor',
+                'loss_rat',
+                'Al1',
+                'Al2a',
+                'Al2b',
+                'Al3']
 
+large_data_columns = data_columns + ['tau_c',
+                                     'fc_1',
+                                     'fc_2',
+                                     'htr',
+                                     'spf_stator',
+                                     'stagger_stator',
+                                     'recamber_le_stator',
+                                     'recamber_te_stator',
+                                     'Rle_stator',
+                                     'beta_stator',
+                                     't_ps_stator',
+                                     't_ss_stator',
+                                     'max_t_loc_ps_stator',
+                                     'max_t_loc_ss_stator',
+                                     'lean_stator',
+                                     'spf_rotor',
+                                     'stagger_rotor',
+                                     'recamber_le_rotor',
+                                     'recamber_te_rotor',
+                                     'Rle_rotor',
+                                     'beta_rotor',
+                                     't_ps_rotor',
+                                     't_ss_rotor',
+                                     'max_t_loc_ps_rotor',
+                                     'max_t_loc_ss_rotor',
+                                     'lean_rotor']
+
+large_dataset_name = 'turbine_data'
+
+# variable -> nominal value, or (low, high) pair of nominal values, kept within factor% by read_in_data
+dataset_slices = {'4D':{'Lambda':0.5},
+                  '4D only':{'Lambda':0.5},
+                  '3D':{'Co':0.65,
+                        'Lambda':0.5},
+                  '2D':{'Lambda':0.5,
+                        'M2':(0.65,0.7),
+                        'Co':(0.65,0.7)},
+                  '2D only':{'Lambda':0.5,
+                             'M2':(0.65,0.7),
+                             'Co':(0.65,0.7)},
+                  '2D_tip_gap':{'Lambda':0.5,
+                                'M2':0.67,
+                                'Co':0.65}}
+
+# as dataset_slices, for read_in_large_dataset
+large_dataset_slices = {'4D':{'Lambda':0.5},
+                        '3D':{'Co':0.65,
+                              'Lambda':0.5},
+                        '2D':{'Lambda':0.5,
+                              'M2':(0.65,0.7),
+                              'Co':(0.65,0.7)},
+                        '2D_tip_gap':{'Lambda':0.5,
+                                      'M2':0.67,
+                                      'Co':0.65},
+                        'bonus':{'Lambda':0.5,
+                                 'M2':0.67,
+                                 'Co':0.65,
+                                 'phi':0.81,
+                                 'psi':1.78}}
+
+# applied to every read_in_large_dataset slice: no tip clearance or fillets
+large_dataset_base_slice = {'tau_c':0.0,
+                            'fc_1':0.0,
+                            'fc_2':0.0}
+
+store_version = 1
+
+_dataset_store = None
+
+def _data_path():
+   package_path = pkg_resources.resource_filename('turbine_design','')
+   return '/'.join((package_path, 'Data'))
+
+def _store_path():
+   return '/'.join((_data_path(), '.dataset_store'))
+
+def _file_sha1(filename):
+   sha1 = hashlib.sha1()
+   with open(filename,'rb') as file:
+      for block in iter(lambda: file.read(1 << 20), b''):
+         sha1.update(block)
+   return sha1.hexdigest()
+
+def _read_source_csv(filename):
+   # (df, number of columns in the file) for one CSV in the Data folder, with df named and padded to large_data_columns, or None if its shape is not recognised
+   df = pd.read_csv(filename)
+   n_columns = df.shape[1]
+   
+   if filename.stem == large_dataset_name:
+      if df.shape[1] != len(large_data_columns):
+         return None, n_columns
+      df.columns = large_data_columns
+      
+   elif df.shape[1] == 20:
+      df.columns = data_columns
+      
+   elif df.shape[1] == 6:
+      df.columns = data_columns[:6]
+      df['runid'] = randint(10000000000,100000000000)
+      
+   elif df.shape[1] == 7:
+      df.columns = data_columns[:7]
+      
+   else:
+      return None, n_columns
+   
+   # columns missing from incomplete files are zero, and NaN for the extra columns of the large dataset
+   for column in data_columns[df.shape[1]:]:
+      df[column] = 0
+   
+   return df.reindex(columns=large_data_columns).astype(np.float64), n_columns
+
+def build_dataset_store(force=False):
+   """Ingest every CSV in the Data folder into a single columnar store, if any CSV has changed since it was last built.
+
+   The store is a folder of one float64 .npy file per column, plus a source file code per row, and a manifest recording the content hash, size, modification time, column count and row range of each CSV. A CSV whose size or modification time has changed is only treated as changed if its hash differs. If the Data folder cannot be written to, the store is kept in memory for this process only.
+
+   Args:
+       force (bool, optional): Rebuild the store even if no CSV has changed. Defaults to False.
+
+   Returns:
+       dict: Store with keys 'manifest', 'columns' (dict of column arrays, memory-mapped when read from disk) and 'source' (source file index of each row).
+   """
+   global _dataset_store
+   
+   files = sorted([filename for filename in Path(_data_path()).glob('*.csv') if filename.is_file()])
+   
+   if (force == False) and (_dataset_store is None):
+      _dataset_store = _load_dataset_store()
+      
+   if (force == False) and (_dataset_store is not None) and _store_is_current(_dataset_store['manifest'],files):
+      return _dataset_store
+   
+   sources = []
+   column_arrays = {column:[] for column in large_data_columns}
+   source_codes = []
+   n_rows = 0
+   for filename in files:
+      df, n_columns = _read_source_csv(filename)
+      stat = filename.stat()
+      source = {'name':filename.stem,
+                'file':filename.name,
+                'sha1':_file_sha1(filename),
+                'size':stat.st_size,
+                'mtime_ns':stat.st_mtime_ns,
+                'valid':df is not None,
+                'n_columns':n_columns,
+                'start':n_rows,
+                'stop':n_rows}
+      
+      if df is not None:
+         source['stop'] = n_rows + len(df.index)
+         for column in large_data_columns:
+            column_arrays[column].append(df[column].to_numpy())
+         source_codes.append(np.full(len(df.index),len(sources),dtype=np.int32))
+         n_rows = source['stop']
+         
+      sources.append(source)
+   
+   manifest = {'version':store_version,
+               'columns':large_data_columns,
+               'n_rows':n_rows,
+               'sources':sources}
+   columns = {column:np.concatenate(column_arrays[column]) if len(column_arrays[column]) > 0 else np.zeros(0) for column in large_data_columns}
+   source = np.concatenate(source_codes) if len(source_codes) > 0 else np.zeros(0,dtype=np.int32)
+   
+   try:
+      _write_dataset_store(manifest,columns,source)
+   except OSError:
+      pass
+   
+   _dataset_store = {'manifest':manifest,
+                     'columns':columns,
+                     'source':source}
+   return _dataset_store
+
+def _store_is_current(manifest,files):
+   # True if files match the manifest, checking hashes only where size or modification time have changed
+   if [source['file'] for source in manifest['sources']] != [filename.name for filename in files]:
+      return False
+   
+   touched = False
+   for source,filename in zip(manifest['sources'],files):
+      stat = filename.stat()
+      if (stat.st_size == source['size']) and (stat.st_mtime_ns == source['mtime_ns']):
+         continue
+      if _file_sha1(filename) != source['sha1']:
+         return False
+      source['size'] = stat.st_size
+      source['mtime_ns'] = stat.st_mtime_ns
+      touched = True
+   
+   # record the new modification times so the files are not hashed again
+   if touched and os.path.exists(f'{_store_path()}/manifest.json'):
+      try:
+         with open(f'{_store_path()}/manifest.json','w') as file:
+            json.dump(manifest,file,indent=3)
+      except OSError:
+         pass
+      
+   return True
+
+def _write_dataset_store(manifest,columns,source):
+   store_path = _store_path()
+   os.makedirs(store_path,exist_ok=True)
+   
+   # the manifest marks a complete store, so it is removed while the arrays are rewritten
+   manifest_filename = f'{store_path}/manifest.json'
+   if os.path.exists(manifest_filename):
+      os.remove(manifest_filename)
+   
+   for index,column in enumerate(large_data_columns):
+      np.save(f'{store_path}/column_{index}.npy',columns[column])
+   np.save(f'{store_path}/source.npy',source)
+   
+   with open(manifest_filename,'w') as file:
+      json.dump(manifest,file,indent=3)
+
+def _load_dataset_store():
+   # store read from disk with its arrays memory-mapped, or None if there is no usable store
+   manifest_filename = f'{_store_path()}/manifest.json'
+   if not os.path.exists(manifest_filename):
+      return None
+   
+   with open(manifest_filename,'r') as file:
+      manifest = json.load(file)
+   if (manifest.get('version') != store_version) or (manifest.get('columns') != large_data_columns):
+      return None
+   
+   columns = {column:np.load(f'{_store_path()}/column_{index}.npy',mmap_mode='r') for index,column in enumerate(large_data_columns)}
+   source = np.load(f'{_store_path()}/source.npy',mmap_mode='r')
+   
+   return {'manifest':manifest,
+           'columns':columns,
+           'source':source}
+
+def _store_columns(store,codes,columns):
+   # arrays of the given columns over the rows of the given source files, in store order
+   # a single file is a contiguous slice, so its arrays are views of the store rather than copies
+   if len(codes) == 1:
+      source = store['manifest']['sources'][codes[0]]
+      rows = slice(source['start'],source['stop'])
+   else:
+      rows = np.isin(store['source'],codes)
+   return {column:store['columns'][column][rows] for column in columns}
+
+def slice_mask(data,
+               spec,
+               factor=5):
+   """Vectorised mask of the rows lying within the tolerance band of every variable in a slice specification.
+
+   Args:
+       data (dict or pd.DataFrame): column name -> array of values.
+       spec (dict): variable -> nominal value, or (low, high) pair of nominal values, e.g. dataset_slices['3D'].
+       factor (int, optional): tolerance band as a percentage of the nominal value. Defaults to 5.
+
+   Returns:
+       np.ndarray: boolean mask, True where low*(1-factor/100) < value < high*(1+factor/100) for every variable. A nominal of zero matches exactly.
+   """
+   
+   lower_factor = 1 - factor/100
+   upper_factor = 1 + factor/100
+   
+   mask = None
+   for variable,nominal in spec.items():
+      
+      if variable not in data:
+         sys.exit(f'Slice variable {variable} is not a column of the data')
+      values = np.asarray(data[variable])
+      
+      if np.ndim(nominal) == 0:
+         low,high = nominal,nominal
+      else:
+         low,high = nominal
+      lower = lower_factor*low
+      upper = upper_factor*high
+      
+      if lower == upper:
+         in_band = (values == lower)
+      else:
+         in_band = (values > lower)
+         in_band &= (values < upper)
+         
+      if mask is None:
+         mask = in_band
+      else:
+         mask &= in_band
+   
+   if mask is None:
+      mask = np.ones(len(data[list(data.keys())[0]]),dtype=bool)
+   
+   return mask
 
 def read_in_data(dataset='4D',
                  factor=5,
                  state_retention_statistics=False,
-                 ignore_incomplete=False):
+                 ignore_incomplete=False,
+                 slices=None):
    """_summary_
 
    Args:
@@ -19,27 +335,20 @@ def read_in_data(dataset='4D',
        factor (int, optional): _description_. Defaults to 5.
        state_retention_statistics (bool, optional): _description_. Defaults to False.
        ignore_incomplete (bool, optional): _description_. Defaults to False.
+       slices (dict, optional): user-defined slice, variable -> nominal value or (low, high) pair, applied on top of dataset_slices[dataset]. Defaults to None.
 
    Returns:
        _type_: _description_
    """
 
-   package_path = pkg_resources.resource_filename('turbine_design','')
-   subfolder_path = '/'.join((package_path, 'Data'))
-
-   dataframe_dict = {}
-   n_before = 0
-   n_after = 0
+   store = build_dataset_store()
    
-   files = Path(subfolder_path).glob('*')
-   for filename in files:
+   codes = []
+   for code,source in enumerate(store['manifest']['sources']):
 
-      data_name = str(filename.stem)
-      
-      if data_name == 'turbine_data':
-         continue
+      data_name = source['name']
       
-      if str(filename.suffix) != '.csv':
+      if data_name == large_dataset_name:
          continue
       
       if dataset=='all':
@@ -59,148 +368,36 @@ def read_in_data(dataset='4D',
          if data_name not in dataset:
             continue
       
-      df = pd.read_csv(filename)
-
-      if df.shape[1] == 20:
-         df.columns=["phi",
-                     "psi", 
-                     "Lambda", 
-                     "M2", 
-                     "Co", 
-                     "eta_lost",
-                     "runid",
-                     'Yp_stator', 
-                     'Yp_rotor', 
-                     'zeta_stator',
-                     'zeta_rotor',
-                     's_cx_stator',
-                     's_cx_rotor',
-                     'AR_stator',
-                     'AR_rotor',
-                     'loss_rat',
-                     'Al1',
-                     'Al2a',
-                     'Al2b',
-                     'Al3']
-         
-      elif df.shape[1] == 6:
-         df.columns=["phi",
-                  "psi", 
-                  "Lambda", 
-                  "M2", 
-                  "Co", 
-                  "eta_lost"]
-         df['runid'] = randint(10000000000,100000000000)
-         df['Yp_stator'] = 0 
-         df['Yp_rotor'] = 0 
-         df['zeta_stator'] = 0
-         df['zeta_rotor'] = 0
-         df['s_cx_stator'] = 0
-         df['s_cx_rotor'] = 0
-         df['AR_stator'] = 0
-         df['AR_rotor'] = 0
-         df['loss_rat'] = 0
-         df['Al1'] = 0
-         df['Al2a'] = 0
-         df['Al2b'] = 0
-         df['Al3'] = 0
-         if ignore_incomplete==True:
-            continue
-            
-      elif df.shape[1] == 7:
-         df.columns=["phi",
-                     "psi", 
-                     "Lambda", 
-                     "M2", 
-                     "Co", 
-                     "eta_lost",
-                     "runid"]
-         df['Yp_stator'] = 0 
-         df['Yp_rotor'] = 0 
-         df['zeta_stator'] = 0
-         df['zeta_rotor'] = 0
-         df['s_cx_stator'] = 0
-         df['s_cx_rotor'] = 0
-         df['AR_stator'] = 0
-         df['AR_rotor'] = 0
-         df['loss_rat'] = 0
-         df['Al1'] = 0
-         df['Al2a'] = 0
-         df['Al2b'] = 0
-         df['Al3'] = 0
-         if ignore_incomplete==True:
-            continue
-      else:
+      if source['valid'] == False:
          sys.exit('Invalid dataframe')
+         
+      elif (source['n_columns'] in [6,7]) and (ignore_incomplete==True):
+         continue
       
-      # filter by factor% error
-      lower_factor = 1 - factor/100
-      upper_factor = 1 + factor/100
-      
-      n_before += len(df.index)
+      codes.append(code)
       
-      if dataset in ['4D','4D only']:
-         # Lambda = 0.5
-         val = 0.5
-         df = df[df["Lambda"] < upper_factor*val]
-         df = df[df["Lambda"] > lower_factor*val]
-         
-      elif dataset in ['3D']:
-         # Co = 0.65
-         val=0.65
-         df = df[df["Co"] < upper_factor*val]
-         df = df[df["Co"] > lower_factor*val]
-         # Lambda = 0.5
-         val = 0.5
-         df = df[df["Lambda"] < upper_factor*val]
-         df = df[df["Lambda"] > lower_factor*val]
-         
-      elif dataset in ['2D','2D only']:
-         # Lambda = 0.5
-         val=0.5
-         df = df[df["Lambda"] < upper_factor*val]
-         df = df[df["Lambda"] > lower_factor*val]
-         # M2 = 0.7 or 0.65
-         val_h=0.7
-         val_l=0.65
-         df = df[df["M2"] < upper_factor*val_h]
-         df = df[df["M2"] > lower_factor*val_l]
-         # Co = 0.65 or 0.7
-         val_h=0.7
-         val_l=0.65
-         df = df[df["Co"] < upper_factor*val_h]
-         df = df[df["Co"] > lower_factor*val_l]
-         
-      elif dataset in ['2D_tip_gap']:
-         # Lambda = 0.5
-         val=0.5
-         df = df[df["Lambda"] < upper_factor*val]
-         df = df[df["Lambda"] > lower_factor*val]
-         # M2 = 0.7 or 0.65
-         val=0.67
-         df = df[df["M2"] < upper_factor*val]
-         df = df[df["M2"] > lower_factor*val]
-         # Co = 0.65 or 0.7
-         val=0.65
-         df = df[df["Co"] < upper_factor*val]
-         df = df[df["Co"] > lower_factor*val]
-         
-      df = df.reindex(sorted(df.columns), axis=1)
-         
-      n_after += len(df.index)
+   arrays = _store_columns(store,codes,data_columns)
+   
+   # filter by factor% error, as one mask over the store arrays
+   named_slice = dataset_slices.get(dataset,{}) if isinstance(dataset,str) else {}
+   spec = {**named_slice,**(slices or {})}
+   mask = slice_mask(arrays,spec,factor)
+   
+   n_before = len(mask)
+   
+   df = pd.DataFrame({column:arrays[column][mask] for column in sorted(arrays)})
       
-      dataframe_dict[data_name] = df
+   n_after = len(df.index)
 
    if state_retention_statistics==True:
       print(f'n_before = {n_before}\nn_after = {n_after}\n%retained = {n_after/n_before*100:.2f} %')
-   dataframe_list = dataframe_dict.values()   
-   data = pd.concat(dataframe_list,ignore_index=True)
 
-   return data
+   return df
 
 def read_in_large_dataset(dataset='4D',
                           factor=5,
-                          state_retention_statistics=False):
+                          state_retention_statistics=False,
+                          slices=None):
    """_summary_
 
    Args:
@@ -208,146 +405,32 @@ def read_in_large_dataset(dataset='4D',
        data_filename (str, optional): _description_. Defaults to 'Data/turbine_data.csv'.
        factor (int, optional): _description_. Defaults to 5.
        state_retention_statistics (bool, optional): _description_. Defaults to False.
+       slices (dict, optional): user-defined slice, variable -> nominal value or (low, high) pair, applied on top of large_dataset_slices[dataset]. Defaults to None.
 
    Returns:
        _type_: _description_
    """
 
    
-   package_path = pkg_resources.resource_filename('turbine_design','')
-   data_filename = '/'.join((package_path, 'Data', 'turbine_data.csv'))
-
-   df = pd.read_csv(data_filename)
-
-   df.columns=["phi",
-               "psi", 
-               "Lambda", 
-               "M2", 
-               "Co", 
-               "eta_lost",
-               "runid",
-               'Yp_stator', 
-               'Yp_rotor', 
-               'zeta_stator',
-               'zeta_rotor',
-               's_cx_stator',
-               's_cx_rotor',
-               'AR_stator',
-               'AR_rotor',
-               'loss_rat',
-               'Al1',
-               'Al2a',
-               'Al2b',
-               'Al3',
-               'tau_c',
-               'fc_1',
-               'fc_2',
-               'htr',
-               'spf_stator',
-               'stagger_stator',
-               'recamber_le_stator',
-               'recamber_te_stator',
-               'Rle_stator',
-               'beta_stator',
-               't_ps_stator',
-               't_ss_stator',
-               'max_t_loc_ps_stator',
-               'max_t_loc_ss_stator',
-               'lean_stator',
-               'spf_rotor',
-               'stagger_rotor',
-               'recamber_le_rotor',
-               'recamber_te_rotor',
-               'Rle_rotor',
-               'beta_rotor',
-               't_ps_rotor',
-               't_ss_rotor',
-               'max_t_loc_ps_rotor',
-               'max_t_loc_ss_rotor',
-               'lean_rotor']
+   store = build_dataset_store()
    
-   df['eta'] = (1-df['eta_lost'])
-   df['Yp_rat'] = df['Yp_rotor']/df['Yp_stator']
+   codes = [code for code,source in enumerate(store['manifest']['sources']) if (source['name'] == large_dataset_name) and source['valid']]
+   if len(codes) == 0:
+      sys.exit(f'No valid {large_dataset_name}.csv in Data')
+
+   arrays = _store_columns(store,codes,large_data_columns)
+   
+   arrays['eta'] = (1-arrays['eta_lost'])
+   arrays['Yp_rat'] = arrays['Yp_rotor']/arrays['Yp_stator']
       
-   # filter by factor% error
-   lower_factor = 1 - factor/100
-   upper_factor = 1 + factor/100
+   # filter by factor% error, as one mask over the store arrays
+   named_slice = large_dataset_slices.get(dataset,{}) if isinstance(dataset,str) else {}
+   spec = {**large_dataset_base_slice,**named_slice,**(slices or {})}
+   mask = slice_mask(arrays,spec,factor)
    
-   n_before = len(df.index)
+   n_before = len(mask)
    
-   df = df[df['tau_c'] == 0.0]
-   df = df[df['fc_1'] == 0.0]
-   df = df[df['fc_2'] == 0.0]
-
-   if dataset in ['4D']:
-      # Lambda = 0.5
-      val = 0.5
-      df = df[df["Lambda"] < upper_factor*val]
-      df = df[df["Lambda"] > lower_factor*val]
-      
-   elif dataset in ['3D']:
-      # Co = 0.65
-      val=0.65
-      df = df[df["Co"] < upper_factor*val]
-      df = df[df["Co"] > lower_factor*val]
-      # Lambda = 0.5
-      val = 0.5
-      df = df[df["Lambda"] < upper_factor*val]
-      df = df[df["Lambda"] > lower_factor*val]
-      
-   elif dataset in ['2D']:
-      # Lambda = 0.5
-      val=0.5
-      df = df[df["Lambda"] < upper_factor*val]
-      df = df[df["Lambda"] > lower_factor*val]
-      # M2 = 0.7 or 0.65
-      val_h=0.7
-      val_l=0.65
-      df = df[df["M2"] < upper_factor*val_h]
-      df = df[df["M2"] > lower_factor*val_l]
-      # Co = 0.65 or 0.7
-      val_h=0.7
-      val_l=0.65
-      df = df[df["Co"] < upper_factor*val_h]
-      df = df[df["Co"] > lower_factor*val_l]
-      
-   elif dataset in ['2D_tip_gap']:
-      # Lambda = 0.5
-      val=0.5
-      df = df[df["Lambda"] < upper_factor*val]
-      df = df[df["Lambda"] > lower_factor*val]
-      # M2 = 0.67
-      val=0.67
-      df = df[df["M2"] < upper_factor*val]
-      df = df[df["M2"] > lower_factor*val]
-      # Co = 0.65
-      val=0.65
-      df = df[df["Co"] < upper_factor*val]
-      df = df[df["Co"] > lower_factor*val]
-      
-   elif dataset in ['bonus']:
-      # Lambda = 0.5
-      val=0.5
-      df = df[df["Lambda"] < upper_factor*val]
-      df = df[df["Lambda"] > lower_factor*val]
-      # M2 = 0.67
-      val=0.67
-      df = df[df["M2"] < upper_factor*val]
-      df = df[df["M2"] > lower_factor*val]
-      # Co = 0.65
-      val=0.65
-      df = df[df["Co"] < upper_factor*val]
-      df = df[df["Co"] > lower_factor*val]
-      # phi = 0.81
-      val=0.81
-      df = df[df["phi"] < upper_factor*val]
-      df = df[df["phi"] > lower_factor*val]
-      # psi = 1.78
-      val=1.78
-      df = df[df["psi"] < upper_factor*val]
-      df = df[df["psi"] > lower_factor*val]
-      
-   df = df.reindex(sorted(df.columns), axis=1)
+   df = pd.DataFrame({column:arrays[column][mask] for column in sorted(arrays)})
       
    n_after = len(df.index)
 
@@ -1,5 +1,8 @@
 from .turbigen import three_dimensional_stage, ohmesh 
 import pkg_resources
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
 
 def get_shape(params):
     """Function to return shape from a parameters object.
@@ -39,15 +42,65 @@ def get_shape(params):
 
     return nb, h, c, ps, ss
 
-def get_coordinates():
-    
-    package_path = pkg_resources.resource_filename('turbine_design','')
-    json_subfolder_path = '/'.join((package_path, 'turbine_json'))
+def get_coordinates(params=None):
+    """Return shape from a parameter set, by default read from `turbine_params.json`.
+
+    Parameters
+    ----------
+    params: StageParameterSet or dict, optional
+        Parameter set to use. If not given, `turbine_json/turbine_params.json`
+        in the package is loaded, as exported by
+        `turbine.get_non_dim_geometry(export_json=True)`.
+
+    """
+
+    if params is None:
+        package_path = pkg_resources.resource_filename('turbine_design','')
+        json_subfolder_path = '/'.join((package_path, 'turbine_json'))
 
-    # Load a parameter set
-    params = three_dimensional_stage.StageParameterSet.from_json(f"{json_subfolder_path}/turbine_params.json")
+        # Load a parameter set
+        params = three_dimensional_stage.StageParameterSet.from_json(f"{json_subfolder_path}/turbine_params.json")
+
+    elif isinstance(params, dict):
+        params = three_dimensional_stage.StageParameterSet(copy.deepcopy(params))
 
     # Extract shape
     nb, h, c, ps, ss = get_shape(params)
     
     return nb, h, c, ps, ss
+
+def _shape_from_params(params):
+    if isinstance(params, dict):
+        # StageParameterSet consumes parts of its input dictionary, so work on a copy
+        params = three_dimensional_stage.StageParameterSet(copy.deepcopy(params))
+    return get_shape(params)
+
+def get_shapes(param_sets, workers=1):
+    """Return shapes for several designs, optionally over a pool of processes.
+
+    Parameters
+    ----------
+    param_sets: list of StageParameterSet or dict
+        Stage parameter sets, or dictionaries in the same format as
+        `turbine_params.json`.
+    workers: int
+        Number of worker processes. `None` uses one per CPU, `1` runs
+        in the calling process.
+
+    Returns
+    -------
+    shapes: list of tuple
+        `(nb, h, c, ps, ss)` for each design, as returned by `get_shape`.
+
+    """
+
+    if workers == 1 or len(param_sets) < 2:
+        return [_shape_from_params(params) for params in param_sets]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # A few chunks per worker amortises the pickling without starving the pool
+    chunksize = max(1, len(param_sets) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_shape_from_params, param_sets, chunksize=chunksize))
@@ -2,26 +2,26 @@
 
 import numpy as np
 
-try:
-    import compflow_native as cf
-except ModuleNotFoundError:
-    import compflow as cf
+from . import compflow_native as cf
 
 
 def node_to_face(var):
-    """For a (n,m) matrix of some property, average over the four corners of
-    each face to produce an (n-1,m-1) matrix of face-centered properties."""
-    return np.mean(
-        np.stack(
-            (var[:-1, :-1], var[1:, 1:], var[:-1, 1:], var[1:, :-1]),
-        ),
-        axis=0,
-    )
+    """For a (..., n,m) matrix of some property, average over the four corners
+    of each face to produce an (..., n-1,m-1) matrix of face-centered
+    properties. Leading axes are carried through as batch axes."""
+    face = var[..., :-1, :-1] + var[..., 1:, 1:]
+    face += var[..., :-1, 1:]
+    face += var[..., 1:, :-1]
+    face *= 0.25
+    return face
 
 
 def face_length(c):
-    """For (n,m) matrix of coordinates, get face length matrices."""
-    return c[1:, 1:] - c[:-1, :-1], c[:-1, 1:] - c[1:, :-1]
+    """For (..., n,m) matrix of coordinates, get face length matrices."""
+    return (
+        c[..., 1:, 1:] - c[..., :-1, :-1],
+        c[..., :-1, 1:] - c[..., 1:, :-1],
+    )
 
 
 def face_area(x, r, rt):
@@ -96,68 +96,114 @@ def primary_to_fluxes(r, ro, rovx, rovr, rorvt, roe, ga, rgas, Omega):
 def mix_out(x, r, rt, ro, rovx, rovr, rorvt, roe, ga, rgas, Omega):
     """Perform mixed-out averaging."""
 
+    # A single cut is a batch of one
+    x, r, rt, ro, rovx, rovr, rorvt, roe = [
+        np.reshape(v, (1,) + np.shape(v)[:2])
+        for v in (x, r, rt, ro, rovx, rovr, rorvt, roe)
+    ]
+
+    mixed = mix_out_batch(x, r, rt, ro, rovx, rovr, rorvt, roe, ga, rgas, Omega)
+
+    return tuple(v[0] for v in mixed)
+
+
+def mix_out_batch(x, r, rt, ro, rovx, rovr, rorvt, roe, ga, rgas, Omega):
+    """Perform mixed-out averaging on a batch of same-shaped cuts.
+
+    The flow variables have shape (nbatch, n, m), for example a time series
+    of one cut. The coordinates have the same shape, or shape (n, m) if they
+    are shared by the whole batch, in which case the face areas are only
+    calculated once. All flux components are integrated together and the
+    fixed-point iteration runs over the batch at once, each cut stopping
+    when it has converged. The mixed-out state is returned as arrays of
+    shape (nbatch,)."""
+
     cv = rgas / (ga - 1.0)
     cp = cv * ga
 
-    # Get fluxes
-    mass_fl, xmom_fl, rtmom_fl, ho_fl = primary_to_fluxes(
-        r, ro, rovx, rovr, rorvt, roe, ga, rgas, Omega
+    # Get fluxes, stacked to (4, 2, nbatch, n, m)
+    fluxes = np.stack(
+        primary_to_fluxes(r, ro, rovx, rovr, rorvt, roe, ga, rgas, Omega)
     )
 
-    # Get totals by integrating over area
-    mass_tot = area_integrate(x, r, rt, *mass_fl)
-    xmom_tot = area_integrate(x, r, rt, *xmom_fl)
-    rtmom_tot = area_integrate(x, r, rt, *rtmom_fl)
-    ho_tot = area_integrate(x, r, rt, *ho_fl)
+    # Face areas, stacked to (2, [nbatch,] n-1, m-1)
+    dA = np.stack(face_area(x, r, rt))
+
+    # Get totals by integrating all the fluxes over area in one pass,
+    # accumulating in double precision whatever the working precision
+    mass_tot, xmom_tot, rtmom_tot, ho_tot = np.einsum(
+        "kd...ij,d...ij->k...", node_to_face(fluxes), dA, dtype=np.float64
+    )
+
+    nbatch = mass_tot.shape[0]
 
     # Mix out at the mean radius
-    rmid = np.mean((r.min(), r.max()))
+    rmid = 0.5 * (
+        r.min(axis=(-2, -1)).astype(np.float64) + r.max(axis=(-2, -1))
+    )
+    rmid = rmid * np.ones(nbatch)
 
     # The hypothetical mixed-out state is at constant x
-    # So get the projected area in x-direction by integrating fx = 1, fr = 0
-    Ax = area_integrate(x, r, rt, np.ones_like(x), np.zeros_like(x))
+    # So get the projected area in x-direction by summing x areas
+    Ax = dA[0].sum(axis=(-2, -1), dtype=np.float64) * np.ones(nbatch)
 
     # Guess for density
-    ro_mix = np.mean(ro)
+    ro_mix = np.mean(ro, axis=(-2, -1), dtype=np.float64)
 
-    # Fixed point iteration
+    vx_mix = np.empty(nbatch)
+    vt_mix = np.empty(nbatch)
+    vsq_mix = np.empty(nbatch)
+    T_mix = np.empty(nbatch)
+
+    # Fixed point iteration on the cuts that have not yet converged
     max_iter = 100
     tol_rel = 1e-6
+    iconv = np.arange(nbatch)
     for i in range(max_iter):
 
+        ro_i = ro_mix[iconv]
+        Ax_i = Ax[iconv]
+        rmid_i = rmid[iconv]
+
         # Axial velocity by conservation of mass
-        vx_mix = mass_tot / ro_mix / Ax
+        vx_i = mass_tot[iconv] / ro_i / Ax_i
 
         # Tangential velocity by conservation of moment of angular momentum
-        vt_mix = rtmom_tot / ro_mix / vx_mix / rmid / Ax
+        vt_i = rtmom_tot[iconv] / ro_i / vx_i / rmid_i / Ax_i
 
         # Pressure by conservation of axial momentum
-        P_mix = xmom_tot / Ax - ro_mix * vx_mix ** 2.0
+        P_i = xmom_tot[iconv] / Ax_i - ro_i * vx_i ** 2.0
 
         # Stagnation enthalpy by conservation of energy
-        ho_mix = ho_tot / ro_mix / vx_mix / Ax + rmid * Omega * vt_mix
+        ho_i = ho_tot[iconv] / ro_i / vx_i / Ax_i + rmid_i * Omega * vt_i
 
         # Mixed-out Mach
-        vsq_mix = vx_mix ** 2.0 + vt_mix ** 2.0
-        V_cpTo_mix = np.sqrt(vsq_mix / ho_mix)
-        Ma_mix = cf.Ma_from_V_cpTo(V_cpTo_mix, ga)
+        vsq_i = vx_i ** 2.0 + vt_i ** 2.0
+        V_cpTo_i = np.sqrt(vsq_i / ho_i)
+        Ma_i = cf.Ma_from_V_cpTo(V_cpTo_i, ga)
 
         # Static temperature
-        T_mix = (ho_mix / cp) / cf.To_T_from_Ma(Ma_mix, ga)
+        T_i = (ho_i / cp) / cf.To_T_from_Ma(Ma_i, ga)
 
         # New density_gess
-        ro_new = P_mix / rgas / T_mix
+        ro_new = P_i / rgas / T_i
+
+        vx_mix[iconv] = vx_i
+        vt_mix[iconv] = vt_i
+        vsq_mix[iconv] = vsq_i
+        T_mix[iconv] = T_i
 
         # Check convergence
-        dro = np.abs(ro_new - ro_mix) / ro_mix
-        ro_mix = ro_new
+        dro = np.abs(ro_new - ro_i) / ro_i
+        ro_mix[iconv] = ro_new
 
-        if dro < tol_rel:
+        iconv = iconv[~(dro < tol_rel)]
+        if not iconv.size:
             break
 
     # Convert mixed state to primary variables
     rovx_mix = ro_mix * vx_mix
-    rovr_mix = 0.0  # Parallel streamlines, no radial velocity
+    rovr_mix = np.zeros(nbatch)  # Parallel streamlines, no radial velocity
     rorvt_mix = ro_mix * rmid * vt_mix
     roe_mix = ro_mix * (cv * T_mix + 0.5 * vsq_mix)
 
@@ -16,3 +16,6 @@ except (ImportError, NameError):
 #     warnings.warn(
 #         "Falling back to native compflow. This is slower than the Fortan-accelerated compflow package. Try `pip install compflow`."
 #     )
+
+# The fused evaluation is only provided natively
+from .compflow_native import stagnation_ratios
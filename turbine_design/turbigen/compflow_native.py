@@ -3,10 +3,134 @@
 # Fortan version is not available.
 #
 import numpy as np
-from scipy.optimize import newton
 
 
-# Invert the Mach number relations by solving iteratively
+# Number of points in each inversion table
+_table_points = 1025
+
+# Largest Mach number tabulated on the unbounded branches
+_table_Ma_max = 10.0
+
+# Table inversions whose Newton polish step is larger than this are
+# re-solved from scratch; the same test ends scipy.optimize.newton
+_polish_tol = 1.48e-8
+
+# Iteration limit of the fallback Newton solve, as scipy.optimize.newton
+_newton_maxiter = 50
+
+# Inversion tables, keyed by (var, ga, supersonic)
+_inversion_tables = {}
+
+
+def _table_branch(var, supersonic):
+    # Single-valued relations share one table for both branches
+    if var in ["V_cpTo", "mcpTo_AP"]:
+        return False
+    elif var in ["Posh_Po", "Mash"]:
+        return True
+    else:
+        return bool(supersonic)
+
+
+def inversion_table(var, ga, supersonic=False):
+    """Monotone lookup table for inverting a Mach number relation.
+
+    Tables are built once per (var, ga, branch) and cached.
+
+    Parameters
+    ----------
+    var : str
+        Name of the quantity to invert.
+    ga : float
+        Specific heat ratio.
+    supersonic : bool
+        Tabulate the supersonic branch of double-valued relations.
+
+    Returns
+    -------
+    Y : array
+        Tabulated quantity, in ascending order.
+    Ma : array
+        Mach number at each tabulated point.
+    dMa_dY : array
+        Slope of the inverse relation at each tabulated point.
+
+    """
+    branch = _table_branch(var, supersonic)
+    key = (var, float(ga), branch)
+
+    if key not in _inversion_tables:
+
+        # Monotone range of Mach number on the requested branch
+        if var in ["V_cpTo", "mcpTo_AP"]:
+            Ma_lim = (0.0, _table_Ma_max)
+        elif var in ["mcpTo_APo", "A_Acrit"] and not branch:
+            Ma_lim = (1e-3, 1.0)
+        elif var in ["mcpTo_APo", "A_Acrit", "Posh_Po", "Mash"]:
+            Ma_lim = (1.0, _table_Ma_max)
+        else:
+            raise ValueError("Invalid quantity requested: {}.".format(var))
+
+        Ma = np.linspace(Ma_lim[0], Ma_lim[1], _table_points)
+        Y = from_Ma(var, Ma, ga)
+        with np.errstate(divide="ignore"):
+            dMa_dY = 1.0 / derivative_from_Ma(var, Ma, ga)
+
+        # Slopes are infinite where the relation has a turning point,
+        # so use the secant of the adjacent interval there instead
+        secant = np.diff(Ma) / np.diff(Y)
+        secant = np.concatenate(
+            (secant[:1], 0.5 * (secant[1:] + secant[:-1]), secant[-1:])
+        )
+        singular = ~np.isfinite(dMa_dY)
+        dMa_dY[singular] = secant[singular]
+
+        # Order by ascending Y for searching
+        if Y[-1] < Y[0]:
+            Y, Ma, dMa_dY = Y[::-1], Ma[::-1], dMa_dY[::-1]
+
+        _inversion_tables[key] = (Y, Ma, dMa_dY)
+
+    return _inversion_tables[key]
+
+
+def _interpolate_table(table, Y):
+    # Cubic Hermite interpolation of Ma at Y, and a flag for Y inside the table
+    Yt, Mat, dMat = table
+    i = np.clip(np.searchsorted(Yt, Y) - 1, 0, len(Yt) - 2)
+    h = Yt[i + 1] - Yt[i]
+    t = (Y - Yt[i]) / h
+    t2 = t * t
+    t3 = t2 * t
+    Ma = (
+        (2.0 * t3 - 3.0 * t2 + 1.0) * Mat[i]
+        + (t3 - 2.0 * t2 + t) * h * dMat[i]
+        + (3.0 * t2 - 2.0 * t3) * Mat[i + 1]
+        + (t3 - t2) * h * dMat[i + 1]
+    )
+    inside = (Y >= Yt[0]) & (Y <= Yt[-1])
+    return Ma, inside
+
+
+def _newton_to_Ma(var, Y, ga, Ma_guess):
+    # Elementwise Newton iteration from Ma_guess, NaN where it does not
+    # converge, so one bad point cannot fail or spoil the others
+    Ma = np.ones_like(Y) * Ma_guess
+    converged = np.zeros(np.shape(Y), dtype=bool)
+    with np.errstate(all="ignore"):
+        for _ in range(_newton_maxiter):
+            step = (
+                from_Ma(var, Ma, ga, validate=False) - Y
+            ) / derivative_from_Ma(var, Ma, ga, validate=False)
+            Ma = np.where(converged, Ma, Ma - step)
+            converged |= np.abs(step) < _polish_tol
+            if converged.all():
+                break
+    Ma[~converged] = np.nan
+    return Ma
+
+
+# Invert the Mach number relations by table lookup, or by solving iteratively
 def to_Ma(var, Y_in, ga, supersonic=False):
     #
     # Validate input data
@@ -56,17 +180,26 @@ def to_Ma(var, Y_in, ga, supersonic=False):
 
         else:
 
-            # Wrapper functions for the iterative solve
-            def err(Ma_i):
-                return from_Ma(var, Ma_i, ga, validate=False) - Y[~ich]
+            Y_solve = Y[~ich]
 
-            def jac(Ma_i):
-                return derivative_from_Ma(var, Ma_i, ga, validate=False)
+            # Interpolate from the table, then polish with one Newton step
+            table = inversion_table(var, ga, supersonic)
+            Ma_solve, inside = _interpolate_table(table, Y_solve)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = (
+                    from_Ma(var, Ma_solve, ga, validate=False) - Y_solve
+                ) / derivative_from_Ma(var, Ma_solve, ga, validate=False)
+                Ma_solve = Ma_solve - step
+                unconverged = ~(inside & (np.abs(step) <= _polish_tol))
 
-            # Newton iteration
-            Ma_out[~ich] = newton(
-                err, np.ones_like(Y[~ich]) * Ma_guess, fprime=jac
-            )
+            # Fall back to a full Newton iteration outside the table or
+            # where the polish has not converged
+            if np.any(unconverged):
+                Ma_solve[unconverged] = _newton_to_Ma(
+                    var, Y_solve[unconverged], ga, Ma_guess
+                )
+
+            Ma_out[~ich] = Ma_solve
 
     return Ma_out
 
@@ -153,6 +286,64 @@ def from_Ma(var, Ma_in, ga_in, validate=False):
         raise ValueError("Invalid quantity requested: {}.".format(var))
 
 
+# Several quantities as explicit functions of Ma, in one pass
+def stagnation_ratios(Ma_in, ga, out=None):
+    """Evaluate the common stagnation ratios together for an array of Ma.
+
+    Shares the stagnation temperature ratio between all the outputs and
+    writes into preallocated buffers where given, so large arrays are
+    traversed a few times with no temporaries.
+
+    Parameters
+    ----------
+    Ma_in : array
+        Mach numbers.
+    ga : float
+        Specific heat ratio.
+    out : tuple of 5 arrays, optional
+        Buffers for the outputs, the same shape as `Ma_in`. An entry of
+        None is allocated.
+
+    Returns
+    -------
+    To_T, Po_P, rhoo_rho, V_cpTo, mcpTo_APo : array
+        Stagnation temperature, pressure and density ratios, and the
+        non-dimensional velocity and mass flow functions.
+
+    """
+    Ma = np.asarray(Ma_in)
+
+    if out is None:
+        out = (None,) * 5
+    dtype = np.result_type(Ma, 1.0)
+    To_T, Po_P, rhoo_rho, V_cpTo, mcpTo_APo = [
+        np.empty(Ma.shape, dtype) if buf is None else buf for buf in out
+    ]
+
+    gm1 = ga - 1.0
+
+    # To_T = 1 + (ga - 1)/2 Ma^2
+    np.multiply(Ma, Ma, out=To_T)
+    To_T *= 0.5 * gm1
+    To_T += 1.0
+
+    # Po_P = To_T^(ga/(ga-1)) and rhoo_rho = Po_P / To_T
+    np.power(To_T, ga / gm1, out=Po_P)
+    np.divide(Po_P, To_T, out=rhoo_rho)
+
+    # V_cpTo = sqrt(ga - 1) Ma / sqrt(To_T)
+    np.sqrt(To_T, out=V_cpTo)
+    np.divide(Ma, V_cpTo, out=V_cpTo)
+    V_cpTo *= np.sqrt(gm1)
+
+    # mcpTo_APo = ga/sqrt(ga - 1) Ma To_T^(-(ga+1)/2/(ga-1))
+    #           = ga/(ga - 1) V_cpTo / rhoo_rho
+    np.divide(V_cpTo, rhoo_rho, out=mcpTo_APo)
+    mcpTo_APo *= ga / gm1
+
+    return To_T, Po_P, rhoo_rho, V_cpTo, mcpTo_APo
+
+
 # Quantity derivatives as explict functions of Ma
 def derivative_from_Ma(var, Ma_in, ga_in, validate=False):
     #
@@ -81,25 +81,45 @@ def cluster_hyperbola(npts, fac=3.0):
     return np.tanh(fac * xhat) / 2.0 / np.tanh(fac) + 0.5
 
 
-def cluster_wall(npts, ER, dwall):
-    """."""
+def _cluster_wall_dist(npts, ERi, nci, dwall):
+    """Make a distribution with given num of const cells."""
+    dy_half = dwall * ERi ** np.arange(0, (npts - nci) // 2)
+    dy_const = np.ones((nci,)) * dy_half[-1]
+    dy = np.concatenate((dy_half, dy_const, np.flip(dy_half)))
+    return np.insert(np.cumsum(dy), 0, 0)
 
-    def iter_dist(ERi, nci):
-        """Function to make a distribution with given num of const cells."""
-        dy_half = dwall * ERi ** np.arange(0, (npts - nci) // 2)
-        dy_const = np.ones((nci,)) * dy_half[-1]
-        dy = np.concatenate((dy_half, dy_const, np.flip(dy_half)))
-        return np.insert(np.cumsum(dy), 0, 0)
+
+def _cluster_wall_nconst(npts, ER, dwall):
+    """Number of constant cells for :func:`cluster_wall` to try first.
+
+    Returns None where `cluster_wall` would fail before any iteration,
+    which makes this a cheap exact test for those failures."""
 
     # Initial guess with no constant cells
-    y0 = iter_dist(ER, 0)
+    y0 = _cluster_wall_dist(npts, ER, 0, dwall)
     dy0 = np.diff(y0).max()
     err = 1.0 - y0[-1]
     if err < 0.0:
-        raise Exception("Not going to work.")
+        return None
 
     # Now find number of constant cells to get just over correct distance
     nconst_target = np.ceil(err / dy0).astype(int)
+    if nconst_target > npts:
+        return None
+
+    return nconst_target
+
+
+def cluster_wall(npts, ER, dwall):
+    """."""
+
+    def iter_dist(ERi, nci):
+        """Function to make a distribution with given num of const cells."""
+        return _cluster_wall_dist(npts, ERi, nci, dwall)
+
+    nconst_target = _cluster_wall_nconst(npts, ER, dwall)
+    if nconst_target is None:
+        raise Exception("Not going to work.")
 
     for nconst in [nconst_target, nconst_target - 1]:
 
@@ -142,17 +162,76 @@ def cluster_wall_solve_npts(ER, dwall):
             npts += 8
 
 
-def cluster_wall_solve_ER(npts, dwall):
-    """Determine correct ER at given npts."""
+# Distributions already solved for by cluster_wall_solve_ER, keyed by (npts, dwall)
+_cluster_wall_cache = {}
+
+
+def _solve_cluster_wall_ER(npts, dwall):
+    """Find the first working ER stepping by 1e-4 from 1.001."""
     max_iter = 10000
     ER = 1.001
     for _ in range(max_iter):
+        # Most failing ratios are rejected by the cheap test, so the full
+        # solve only runs where it might succeed
         try:
-            y = cluster_wall(npts, ER, dwall)
-            # print('Final ER = %.3f' % ER)
-            return y
-        except:
-            ER += 0.0001
+            if _cluster_wall_nconst(npts, ER, dwall) is not None:
+                return cluster_wall(npts, ER, dwall)
+        except Exception:
+            pass
+        ER += 0.0001
+    return None
+
+
+def cluster_wall_solve_ER(npts, dwall):
+    """Determine correct ER at given npts.
+
+    Expansion ratios are stepped through as before, returning the first for
+    which :func:`cluster_wall` succeeds, but ratios that fail its initial
+    checks are skipped without running the solve. The working ratios are
+    not contiguous, so the scan is not bisected. Results are cached by
+    `(npts, dwall)`, and can be saved to and loaded from disk with
+    :func:`save_cluster_wall_table` and :func:`load_cluster_wall_table`.
+    """
+    key = (int(npts), float(dwall))
+    if key not in _cluster_wall_cache:
+        _cluster_wall_cache[key] = _solve_cluster_wall_ER(npts, dwall)
+    y = _cluster_wall_cache[key]
+    if y is None:
+        return None
+    else:
+        return y.copy()
+
+
+def save_cluster_wall_table(fname, keys=()):
+    """Save clustering distributions to an `.npz` file.
+
+    Parameters
+    ----------
+    fname : str
+        File to write.
+    keys : sequence of (npts, dwall) pairs, optional
+        Distributions to calculate before saving, in addition to those
+        already in the cache.
+    """
+    for npts, dwall in keys:
+        cluster_wall_solve_ER(npts, dwall)
+
+    solved = [(k, y) for k, y in sorted(_cluster_wall_cache.items()) if y is not None]
+    table = {
+        "npts": np.array([k[0] for k, _ in solved], dtype=int),
+        "dwall": np.array([k[1] for k, _ in solved], dtype=float),
+    }
+    for i, (_, y) in enumerate(solved):
+        table["y_%d" % i] = y
+
+    np.savez(fname, **table)
+
+
+def load_cluster_wall_table(fname):
+    """Load precomputed clustering distributions from an `.npz` file."""
+    with np.load(fname) as table:
+        for i, (npts, dwall) in enumerate(zip(table["npts"], table["dwall"])):
+            _cluster_wall_cache[(int(npts), float(dwall))] = table["y_%d" % i]
 
 
 def A_from_Rle_thick_beta(Rle, thick, beta, tte):
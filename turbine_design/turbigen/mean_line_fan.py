@@ -2,6 +2,7 @@ import scipy.optimize
 import scipy.integrate
 from . import compflow, util
 import numpy as np
+import warnings
 
 expon = 0.62
 muref = 1.8e-5
@@ -66,6 +67,126 @@ def nondim_fan_total_static(
     return fan_out
 
 
+def nondim_fan_total_static_array(
+    phi,  # Flow coefficient [--]
+    Psi_ts,  # Total-to-static pressure rise coefficient [--]
+    Al1,  # Inlet yaw angle [deg]
+    Mab,  # Blade Mach number [--]
+    ga,  # Ratio of specific heats [--]
+    eta,  # Polytropic efficiency [--]
+    Vx_rat=1.0,  # Axial velocity ratio [--]
+    xtol=1.48e-8,  # Convergence tolerance on total-to-total rise [--]
+    maxiter=50,  # Maximum number of iterations
+):
+    r"""Get geometry for many rotor-only fans using total-to-static pressure rise.
+
+    An array version of :func:`nondim_fan_total_static`. The input parameters
+    are broadcast against each other to a 1D array of designs, with `ga`
+    shared by all designs, and the total-to-total pressure rise of every
+    design is found by one vectorised secant iteration. Each design stops
+    iterating as soon as it has converged.
+
+    Returns
+    -------
+    fan : NonDimFan
+        Struct-of-arrays fan geometry, with station quantities of shape
+        `(2, n)` and scalar quantities of shape `(n,)`.
+    """
+
+    phi, Psi_ts, Al1, Mab, eta, Vx_rat = [
+        np.array(x, dtype=float).ravel()
+        for x in np.broadcast_arrays(phi, Psi_ts, Al1, Mab, eta, Vx_rat)
+    ]
+    n = len(phi)
+
+    # Error in TS rise as function of TT rise, for a subset of designs
+    # Non-physical designs give non-finite errors rather than raising, so
+    # that they do not stop the rest of the batch
+    def iter_Psi(x, ind):
+        with np.errstate(all="ignore"):
+            try:
+                fan_now = nondim_fan_total_total(
+                    phi[ind], x, Al1[ind], Mab[ind], ga, eta[ind], Vx_rat[ind]
+                )
+                return fan_now.Psi_ts - Psi_ts[ind]
+            except ValueError:
+                # The Mach inversion rejects the whole batch if any design
+                # is non-physical, so evaluate one design at a time
+                err = np.full(len(x), np.nan)
+                for i, j in enumerate(np.flatnonzero(ind)):
+                    try:
+                        fan_now = nondim_fan_total_total(
+                            phi[j], x[i], Al1[j], Mab[j], ga, eta[j], Vx_rat[j]
+                        )
+                        err[i] = fan_now.Psi_ts - Psi_ts[j]
+                    except ValueError:
+                        pass
+                return err
+
+    # Same starting points as the scalar secant solution
+    all_designs = np.ones(n, dtype=bool)
+    x0, x1 = np.full(n, 1e-6), np.full(n, 10.0)
+    f0, f1 = iter_Psi(x0, all_designs), iter_Psi(x1, all_designs)
+
+    Psi_soln = np.full(n, np.nan)
+    active = all_designs
+    for _ in range(maxiter):
+
+        if not np.any(active):
+            break
+
+        with np.errstate(all="ignore"):
+            x2 = x1 - f1 * (x1 - x0) / (f1 - f0)
+
+        # Designs whose secant step has broken down cannot be solved
+        active = active & np.isfinite(x2)
+
+        f2 = np.full(n, np.nan)
+        f2[active] = iter_Psi(x2[active], active)
+
+        # Designs that have left the physical range cannot be solved
+        active = active & np.isfinite(f2)
+
+        converged = active & ((np.abs(x2 - x1) < xtol) | (f2 == 0.0))
+        Psi_soln = np.where(converged, x2, Psi_soln)
+
+        x0, f0 = np.where(active, x1, x0), np.where(active, f1, f0)
+        x1, f1 = np.where(active, x2, x1), np.where(active, f2, f1)
+        active = active & ~converged
+
+    if np.any(active):
+        warnings.warn(
+            "%d designs did not converge after %d iterations"
+            % (np.sum(active), maxiter)
+        )
+        Psi_soln = np.where(active, x1, Psi_soln)
+
+    # Once we have solutions, evaluate fan geometry of the solved designs
+    solved = np.isfinite(Psi_soln)
+    with np.errstate(all="ignore"):
+        fan_solved = nondim_fan_total_total(
+            phi[solved],
+            Psi_soln[solved],
+            Al1[solved],
+            Mab[solved],
+            ga,
+            eta[solved],
+            Vx_rat[solved],
+        )
+
+    # Unsolved designs are NaN in every design-dependent quantity
+    fan_vals = {}
+    for name, val in fan_solved._asdict().items():
+        if np.ndim(val) and np.shape(val)[-1] == np.sum(solved):
+            fan_vals[name] = np.full(np.shape(val)[:-1] + (n,), np.nan)
+            fan_vals[name][..., solved] = val
+        else:
+            fan_vals[name] = val
+    fan_out = NonDimFan(**fan_vals)
+
+    return fan_out
+
+
 def nondim_fan_total_total(
     phi,  # Flow coefficient [--]
     Psi,  # Total-to-total pressure rise coefficient [--]
@@ -116,12 +237,13 @@ def nondim_fan_total_total(
     Al2 = np.degrees(np.arctan(tanAl2))
 
     # Now we have all flow angles
-    Al = np.array([Al1, Al2])
+    # (stacking rows allows arrays of designs as well as scalars)
+    Al = np.stack(np.broadcast_arrays(Al1, Al2))
     Alrad = np.radians(Al)
     cosAl = np.cos(Alrad)
 
     # Get non-dimensional velocities from definition of flow coefficient
-    Vx_U = np.array([1.0, Vx_rat]) * phi
+    Vx_U = np.stack(np.broadcast_arrays(1.0, Vx_rat * np.ones_like(phi))) * phi
     Vt_U = Vx_U * np.tan(Alrad)
     V_U = np.sqrt(Vx_U ** 2.0 + Vt_U ** 2.0)
 
@@ -131,7 +253,7 @@ def nondim_fan_total_total(
     Alrel = np.degrees(np.arctan2(Vtrel_U, Vx_U))
 
     # Non-dimensional temperatures from blade Ma and temperature ratio
-    To_To1 = np.array([1.0, To2_To1])
+    To_To1 = np.stack(np.broadcast_arrays(1.0, To2_To1))
     cpTo_Usq = To_To1 / Usq_cpTo1
 
     # Mach numbers and capacity from compressible flow relations
@@ -145,7 +267,7 @@ def nondim_fan_total_total(
     #
 
     # Convert to stagnation pressures
-    Po_Po1 = np.array([1.0, Po2_Po1])
+    Po_Po1 = np.stack(np.broadcast_arrays(1.0, Po2_Po1))
 
     # Use definition of capacity to get flow area ratios
     # Area ratios = span ratios because rm = const
@@ -490,6 +490,355 @@ def nondim_stage_from_Lam(
     return stg_out
 
 
+def _Ma_from_V_cpTo_masked(V_cpTo, ga):
+    """Mach numbers from velocity ratios, NaN where these are non-physical."""
+    V_cpTo = np.asarray(V_cpTo)
+    Ma = np.full(V_cpTo.shape, np.nan)
+    # Non-dimensional velocity tends to sqrt(2) as Mach tends to infinity
+    with np.errstate(invalid="ignore"):
+        ok = np.isfinite(V_cpTo) & (V_cpTo >= 0.0) & (V_cpTo < np.sqrt(2.0))
+    if np.any(ok):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            try:
+                Ma[ok] = compflow.Ma_from_V_cpTo(V_cpTo[ok], ga)
+            except (RuntimeError, ValueError, FloatingPointError):
+                # One failed point fails the whole call, so solve each point
+                # on its own and leave only the failures as NaN
+                for i in zip(*np.nonzero(ok)):
+                    try:
+                        Ma[i] = compflow.Ma_from_V_cpTo(V_cpTo[i], ga)
+                    except (RuntimeError, ValueError, FloatingPointError):
+                        pass
+    return Ma
+
+
+def _nondim_stage_from_Al_array(
+    phi,
+    psi,
+    Al1,
+    Al3,
+    Ma2,
+    ga,
+    eta,
+    Vx_rat,
+    loss_rat,
+    mdotc_mdot1,
+    Toc_Toinf,
+    preswirl_factor,
+):
+    """Evaluate :func:`nondim_stage_from_Al` for 1D arrays of designs at once.
+
+    All design parameters are arrays of the same length, apart from `ga` and
+    the coolant and axial velocity ratio pairs, which are shared by every
+    design. Station quantities are returned with shape `(3, n)`.
+    Non-physical designs give NaN instead of raising an error.
+    """
+
+    # Rename coolant parameters for brevity
+    fc = mdotc_mdot1
+
+    turbine = psi > 0.0
+
+    with np.errstate(all="ignore"):
+
+        # Euler work eqn, from 2-3 for a turbine or 1-2 for a compressor
+        tanAl2 = np.where(
+            turbine,
+            np.tan(np.radians(Al3))
+            * Vx_rat[1]
+            * (1.0 + fc[0] + fc[1])
+            / (1.0 + fc[0])
+            + psi / phi,
+            np.tan(np.radians(Al1)) * Vx_rat[0] - psi / phi,
+        )
+
+        Al2 = np.degrees(np.arctan(tanAl2))
+        Al = np.stack((Al1, Al2, Al3))
+        cosAl = np.cos(np.radians(Al))
+
+        # Get non-dimensional velocities from definition of flow coefficient
+        Vx_U = np.stack((Vx_rat[0] * phi, phi, Vx_rat[1] * phi))
+        Vt_U = Vx_U * np.tan(np.radians(Al))
+        V_U = np.sqrt(Vx_U ** 2.0 + Vt_U ** 2.0)
+
+        # Change reference frame for rotor-relative velocities and angles
+        Vtrel_U = Vt_U - 1.0
+        Vrel_U = np.sqrt(Vx_U ** 2.0 + Vtrel_U ** 2.0)
+        Alrel = np.degrees(np.arctan2(Vtrel_U, Vx_U))
+
+        # Turbine, with vane coolant reducing To2
+        To2_To1 = (1.0 + fc[0] * Toc_Toinf[0]) / (1.0 + fc[0])
+        V_sqrtcpTo2 = compflow.V_cpTo_from_Ma(Ma2, ga)
+        U_sqrtcpTo1_turbine = V_sqrtcpTo2 * np.sqrt(To2_To1) / V_U[1]
+        Usq_cpTo1 = U_sqrtcpTo1_turbine ** 2.0
+        rel_factor_inf = 0.5 * Usq_cpTo1 * (1.0 - 2.0 * phi * tanAl2)
+        rel_factor_cool = 0.5 * Usq_cpTo1 * (1.0 - 2.0 * preswirl_factor)
+        Toc2_To1 = Toc_Toinf[1] * (To2_To1 + rel_factor_inf) - rel_factor_cool
+        Toc2_To2 = Toc2_To1 / To2_To1
+        cpTo1_Usq = 1.0 / Usq_cpTo1
+        cpTo2_Usq = cpTo1_Usq * To2_To1
+        cpTo3_Usq = (cpTo2_Usq * (1.0 + fc[0] + fc[1] * Toc2_To2) - psi) / (
+            1.0 + fc[0] + fc[1]
+        )
+        cpTo_Usq_turbine = np.stack((cpTo1_Usq, cpTo2_Usq, cpTo3_Usq))
+
+        # Compressor, setting the tip Mach number directly
+        U_sqrtcpTo1_compressor = compflow.V_cpTo_from_Ma(Ma2, ga) * np.ones_like(
+            phi
+        )
+        cpTo1_Usq = 1.0 / U_sqrtcpTo1_compressor ** 2
+        cpTo3_Usq = cpTo1_Usq - psi
+        cpTo_Usq_compressor = np.stack((cpTo1_Usq, cpTo3_Usq, cpTo3_Usq))
+
+        U_sqrtcpTo1 = np.where(turbine, U_sqrtcpTo1_turbine, U_sqrtcpTo1_compressor)
+        cpTo_Usq = np.where(turbine, cpTo_Usq_turbine, cpTo_Usq_compressor)
+
+        # Mach numbers and capacity from compressible flow relations
+        Ma = _Ma_from_V_cpTo_masked(V_U / np.sqrt(cpTo_Usq), ga)
+        Marel = Ma * Vrel_U / V_U
+        Q = compflow.mcpTo_APo_from_Ma(Ma, ga)
+        Q_Q1 = Q / Q[0]
+
+        # Use polytropic effy to get entropy change
+        To_To1 = cpTo_Usq / cpTo_Usq[0]
+        Ds_cp = -(1.0 - 1.0 / eta) * np.log(To_To1[-1])
+
+        # Split loss using loss ratio
+        s_cp = np.stack(np.broadcast_arrays(0.0, loss_rat, 1.0)) * Ds_cp
+
+        # Convert to stagnation pressures
+        Po_Po1 = np.exp((ga / (ga - 1.0)) * (np.log(To_To1) + s_cp))
+
+        # Account for cooling or bleed flows
+        mdot_mdot1 = np.array([1.0, 1.0 + fc[0], 1 + fc[0] + fc[1]]).reshape(
+            -1, 1
+        ) * np.ones_like(phi)
+
+        # Use definition of capacity to get flow area ratios
+        Dr_Drin = mdot_mdot1 * np.sqrt(To_To1) / Po_Po1 / Q_Q1 * cosAl[0] / cosAl
+
+        # Evaluate some other useful secondary aerodynamic parameters
+        T_To1 = To_To1 / compflow.To_T_from_Ma(Ma, ga)
+        P_Po1 = Po_Po1 / compflow.Po_P_from_Ma(Ma, ga)
+        Porel_Po1 = P_Po1 * compflow.Po_P_from_Ma(Marel, ga)
+
+        # Reaction and loss coefficients referenced to inlet dynamic head
+        Lam = np.where(
+            turbine,
+            (T_To1[2] - T_To1[1]) / (T_To1[2] - T_To1[0]),
+            (T_To1[1] - T_To1[0]) / (T_To1[2] - T_To1[0]),
+        )
+        Yp_vane = np.where(
+            turbine,
+            (Po_Po1[0] - Po_Po1[1]) / (Po_Po1[0] - P_Po1[0]),
+            (Po_Po1[1] - Po_Po1[2]) / (Po_Po1[1] - P_Po1[1]),
+        )
+        Yp_blade = np.where(
+            turbine,
+            (Porel_Po1[1] - Porel_Po1[2]) / (Porel_Po1[1] - P_Po1[1]),
+            (Porel_Po1[0] - Porel_Po1[1]) / (Porel_Po1[0] - P_Po1[0]),
+        )
+
+        # Compressor style total-to-static pressure rise coefficient
+        half_rho_Usq_Po1 = (
+            (0.5 * ga * Ma[0] ** 2.0)
+            / compflow.Po_P_from_Ma(Ma[0], ga)
+            / (V_U[0] ** 2.0)
+        )
+        Psi_ts = (P_Po1[2] - 1.0) / half_rho_Usq_Po1
+
+    return NonDimStage(
+        Yp=np.stack((Yp_vane, Yp_blade)),
+        Al=Al,
+        Alrel=Alrel,
+        Ma=Ma,
+        Marel=Marel,
+        Ax_Ax1=Dr_Drin,
+        Lam=Lam,
+        U_sqrt_cpTo1=U_sqrtcpTo1,
+        Po_Po1=Po_Po1,
+        To_To1=To_To1,
+        phi=phi,
+        psi=psi,
+        ga=ga,
+        Vt_U=Vt_U,
+        Vtrel_U=Vtrel_U,
+        V_U=V_U,
+        Vrel_U=Vrel_U,
+        P3_Po1=P_Po1[2],
+        eta=eta,
+        Psi_ts=Psi_ts,
+        preswirl_factor=preswirl_factor,
+        mdot_mdot1=mdot_mdot1,
+        fc=fc,
+        TRc=Toc_Toinf,
+    )
+
+
+def nondim_stage_from_Lam_array(
+    phi,  # Flow coefficient [--]
+    psi,  # Stage loading coefficient [--]
+    Lam,  # Degree of reaction [--]
+    Al1,  # Inlet yaw angle [deg]
+    Ma2,  # Vane exit Mach number [--]
+    ga,  # Ratio of specific heats [--]
+    eta,  # Polytropic efficiency [--]
+    Vx_rat=(1.0, 1.0),  # Axial velocity ratios [--]
+    loss_rat=0.5,  # Fraction of stator loss [--]
+    mdotc_mdot1=(0.0, 0.0),  # Coolant flows as fraction of inlet [--]
+    Toc_Toinf=(1.0, 1.0),  # Local coolant temperature ratios [--]
+    preswirl_factor=0.0,  # Preswirl factor [--]
+    xtol=1.48e-8,  # Convergence tolerance on exit yaw angle [deg]
+    maxiter=50,  # Maximum number of iterations
+):
+    r"""Get geometry for many aerodynamic parameter sets specifying reaction.
+
+    An array version of :func:`nondim_stage_from_Lam`, which solves for the
+    exit yaw angle of all designs simultaneously. The same coarse scan of
+    exit yaw angle is evaluated for every design in one vectorised call. A
+    bracket on the desired reaction is taken from the monotonic part of each
+    curve, and all designs are then iterated together using a safeguarded
+    secant method, stopping each design as it converges.
+
+    Parameters
+    ----------
+    phi, psi, Lam, Al1, Ma2, eta, loss_rat, preswirl_factor : array
+        Design parameters as in :func:`nondim_stage_from_Lam`, broadcast
+        against each other to a 1D array of `n` designs.
+    ga : float
+        Ratio of specific heats, :math:`\gamma`, shared by all designs.
+    Vx_rat, mdotc_mdot1, Toc_Toinf : array
+        Axial velocity ratios and coolant parameters, shared by all designs.
+    xtol : float, default=1.48e-8
+        Convergence tolerance on exit yaw angle.
+    maxiter : int, default=50
+        Maximum number of secant iterations.
+
+    Returns
+    -------
+    stg : NonDimStage
+        Struct-of-arrays stage geometry, with station quantities of shape
+        `(3, n)` and scalar quantities of shape `(n,)`. Designs for which
+        no solution can be bracketed are NaN.
+    """
+
+    phi, psi, Lam, Al1, Ma2, eta, loss_rat, preswirl_factor = [
+        np.array(x, dtype=float).ravel()
+        for x in np.broadcast_arrays(
+            phi, psi, Lam, Al1, Ma2, eta, loss_rat, preswirl_factor
+        )
+    ]
+    n = len(phi)
+
+    # Error in reaction as function of exit yaw angle, for a subset of designs
+    def iter_Al(x, ind):
+        stg_now = _nondim_stage_from_Al_array(
+            phi[ind],
+            psi[ind],
+            Al1[ind],
+            x,
+            Ma2[ind],
+            ga,
+            eta[ind],
+            Vx_rat,
+            loss_rat[ind],
+            mdotc_mdot1,
+            Toc_Toinf,
+            preswirl_factor[ind],
+        )
+        return stg_now.Lam - Lam[ind]
+
+    # Evaluate guesses over entire possible yaw angle range, for all designs
+    # in one call, non-physical guesses come back as NaN
+    Al_guess = np.linspace(-89.0, 89.0, 21)
+    nguess = len(Al_guess)
+    ind_guess = np.tile(np.arange(n), nguess)
+    Lam_guess = iter_Al(np.repeat(Al_guess, n), ind_guess).reshape(nguess, n)
+
+    # Restrict to the region between minimum and maximum reaction
+    # where the slope is monotonic
+    valid = np.isfinite(Lam_guess)
+    i1 = np.argmax(np.where(valid, Lam_guess, -np.inf), axis=0)
+    i2 = np.argmin(np.where(valid, Lam_guess, np.inf), axis=0)
+    iguess = np.arange(nguess).reshape(-1, 1)
+    in_region = (
+        valid
+        & (iguess >= np.minimum(i1, i2))
+        & (iguess <= np.maximum(i1, i2))
+    )
+
+    # Bracket the root between adjacent guesses with errors of opposite sign
+    with np.errstate(invalid="ignore"):
+        is_bracket = (
+            in_region[:-1]
+            & in_region[1:]
+            & (Lam_guess[:-1] * Lam_guess[1:] <= 0.0)
+        )
+    has_bracket = np.any(is_bracket, axis=0)
+    ib = np.argmax(is_bracket, axis=0)
+    icol = np.arange(n)
+    a, b = Al_guess[ib], Al_guess[ib + 1]
+    fa, fb = Lam_guess[ib, icol], Lam_guess[ib + 1, icol]
+
+    Al_soln = np.where(has_bracket & (fa == 0.0), a, np.nan)
+    active = has_bracket & (fa != 0.0)
+
+    # Secant iteration on all designs, falling back to bisection whenever
+    # the secant step leaves the bracket
+    x0, f0, x1, f1 = a, fa, b, fb
+    for _ in range(maxiter):
+
+        if not np.any(active):
+            break
+
+        with np.errstate(all="ignore"):
+            x2 = x1 - f1 * (x1 - x0) / (f1 - f0)
+            inside = (x2 > np.minimum(a, b)) & (x2 < np.maximum(a, b))
+        x2 = np.where(inside, x2, 0.5 * (a + b))
+
+        f2 = np.full(n, np.nan)
+        f2[active] = iter_Al(x2[active], active)
+
+        # Shrink the bracket, keeping the sign change inside it
+        replace_a = active & (np.sign(f2) == np.sign(fa))
+        replace_b = active & ~replace_a
+        a, fa = np.where(replace_a, x2, a), np.where(replace_a, f2, fa)
+        b, fb = np.where(replace_b, x2, b), np.where(replace_b, f2, fb)
+
+        converged = active & ((np.abs(x2 - x1) < xtol) | (f2 == 0.0))
+        Al_soln = np.where(converged, x2, Al_soln)
+
+        x0, f0 = np.where(active, x1, x0), np.where(active, f1, f0)
+        x1, f1 = np.where(active, x2, x1), np.where(active, f2, f1)
+        active = active & ~converged
+
+    if np.any(active):
+        warnings.warn(
+            "%d designs did not converge after %d iterations"
+            % (np.sum(active), maxiter)
+        )
+        Al_soln = np.where(active, x1, Al_soln)
+
+    # Once we have solutions for the exit flow angle, evaluate stage geometry
+    stg_out = _nondim_stage_from_Al_array(
+        phi,
+        psi,
+        Al1,
+        Al_soln,
+        Ma2,
+        ga,
+        eta,
+        Vx_rat,
+        loss_rat,
+        mdotc_mdot1,
+        Toc_Toinf,
+        preswirl_factor,
+    )
+
+    return stg_out
+
+
 def annulus_line(stg, htr, cpTo1, Omega):
     r"""Return dimensional annulus line from given non-dim' geometry and inlet state.
 
@@ -232,9 +232,9 @@ class StageParameterSet:
         # Disable new attribute creation from now on to catch silent typos
         # self._freeze()
 
-    @property
-    def nondimensional_stage(self):
-        return mean_line_stage.nondim_stage_from_Lam(
+    def _nondimensional_key(self):
+        """Values of all mean-line fields, to detect changes since caching."""
+        return (
             self.phi,
             self.psi,
             self.Lam,
@@ -242,25 +242,67 @@ class StageParameterSet:
             self.Ma2,
             self.ga,
             self.eta_guess,
-            loss_rat=self.loss_split,
-            mdotc_mdot1=self.fc,
-            Toc_Toinf=self.TRc,
+            self.loss_split,
+            np.asarray(self.fc).tobytes(),
+            np.asarray(self.TRc).tobytes(),
         )
 
-    @property
-    def dimensional_stage(self):
-        return mean_line_stage.scale_geometry(
-            self.nondimensional_stage,
+    def _dimensional_key(self):
+        """Values of all fields the dimensional stage depends on."""
+        return self._nondimensional_key() + (
             self.htr,
             self.Omega,
             self.To1,
             self.Po1,
             self.rgas,
-            self.Co,
-            self.AR,
+            np.asarray(self.Co).tobytes(),
+            np.asarray(self.AR).tobytes(),
             self.Re,
         )
 
+    @property
+    def nondimensional_stage(self):
+        """Mean-line stage, cached until a mean-line field changes."""
+        key = self._nondimensional_key()
+        cache = getattr(self, "_nondimensional_cache", None)
+        if cache is None or cache[0] != key:
+            stg = mean_line_stage.nondim_stage_from_Lam(
+                self.phi,
+                self.psi,
+                self.Lam,
+                self.Al1,
+                self.Ma2,
+                self.ga,
+                self.eta_guess,
+                loss_rat=self.loss_split,
+                mdotc_mdot1=self.fc,
+                Toc_Toinf=self.TRc,
+            )
+            cache = (key, stg)
+            self._nondimensional_cache = cache
+        return cache[1]
+
+    @property
+    def dimensional_stage(self):
+        """Dimensional stage, cached until a mean-line, bcond or 3d field changes."""
+        key = self._dimensional_key()
+        cache = getattr(self, "_dimensional_cache", None)
+        if cache is None or cache[0] != key:
+            stg = mean_line_stage.scale_geometry(
+                self.nondimensional_stage,
+                self.htr,
+                self.Omega,
+                self.To1,
+                self.Po1,
+                self.rgas,
+                self.Co,
+                self.AR,
+                self.Re,
+            )
+            cache = (key, stg)
+            self._dimensional_cache = cache
+        return cache[1]
+
     @classmethod
     def from_json(cls, fname):
         """Create a parameter set from a file on disk."""
@@ -82,9 +82,15 @@ def _calculate_zeta(x, rt, normalise=False):
 
 def _join_cuts(cuts, axis, flip):
     cut_out = cuts[0]
-    for vn in dir(cuts[0]):
-        v0 = getattr(cuts[0], vn)
-        v1 = getattr(cuts[1], vn)
+
+    # Read everything before joining, so lazily-derived variables are
+    # evaluated from the unjoined primaries
+    vals = [
+        (vn, getattr(cuts[0], vn), getattr(cuts[1], vn))
+        for vn in dir(cuts[0])
+    ]
+
+    for vn, v0, v1 in vals:
         if np.ndim(v0) == 2:
             if flip:
                 v0 = np.flip(v0, axis=axis)
@@ -479,12 +485,67 @@ def read_hdf5(fname):
     return g
 
 
-class Cut:
-    """Collect flow variables on a cut as attributes."""
+class _derived(object):
+    """Decorate a method to compute a derived cut variable on first access.
+
+    The result is stored in the instance dictionary, which then shadows the
+    method, so each variable is calculated at most once and can still be
+    assigned to directly."""
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        val = self.func(obj)
+        obj.__dict__[self.name] = val
+        return val
+
+
+class Cut(object):
+    """Collect flow variables on a cut as attributes.
+
+    Only the coordinates and primary flow variables are read on
+    construction; everything else is derived on first access."""
 
     def __init__(
-        self, g, bid, ist, ien, jst, jen, kst, ken, squeeze=True
+        self,
+        g,
+        bid,
+        ist,
+        ien,
+        jst,
+        jen,
+        kst,
+        ken,
+        squeeze=True,
+        dtype=None,
+        copy=False,
     ):
+        """Cut a block of a grid.
+
+        Parameters
+        ----------
+        g : Grid
+            Grid to cut from.
+        bid : int
+            Block id.
+        ist, ien, jst, jen, kst, ken : int
+            Index ranges of the cut, negative values count from the end.
+        squeeze : bool
+            Reduce to a 2D array by removing the cut dimension.
+        dtype : dtype, optional
+            Working precision of the cut. Default is to keep the precision
+            of the block arrays, float32 for Turbostream.
+        copy : bool
+            Copy the primary variables out of the grid. Default is to hold
+            strided views into the block arrays, so the cut shares memory
+            with the grid and sees any later changes to it.
+
+        """
 
         self.bid = bid
         self.ist = ist
@@ -496,9 +557,10 @@ class Cut:
         self.ni = ien - ist
         self.nj = jen - jst
         self.nk = ken - kst
-        self.ga = g.get_av("ga")
-        self.cp = g.get_av("cp")
-        self.rpm = g.get_bv("rpm", bid)
+        # Python floats, which do not promote float32 arrays
+        self.ga = float(g.get_av("ga"))
+        self.cp = float(g.get_av("cp"))
+        self.rpm = float(g.get_bv("rpm", bid))
         self.nblade = g.get_bv("nblade", bid)
         self.Omega = self.rpm / 60.0 * 2.0 * np.pi
         self.rgas = self.cp * (self.ga - 1.0) / self.ga
@@ -525,96 +587,159 @@ class Cut:
         if kst < 0:
             kst = nk + kst + 1
 
+        def _read(name, raise_missing):
+            # View of the block property, cast or copied only on request
+            v = g.get_bp(name, bid, raise_missing=raise_missing)[
+                ist:ien, jst:jen, kst:ken
+            ]
+            # Reduce to a 2D array if requested
+            if squeeze:
+                v = np.squeeze(v)
+            if dtype is not None:
+                v = v.astype(dtype, copy=copy)
+            elif copy:
+                v = v.copy()
+            return v
+
         # Always get coordinates
-        self.x = g.get_bp("x", bid)[ist:ien, jst:jen, kst:ken]
-        self.r = g.get_bp("r", bid)[ist:ien, jst:jen, kst:ken]
-        self.rt = g.get_bp("rt", bid)[ist:ien, jst:jen, kst:ken]
+        self.x = _read("x", True)
+        self.r = _read("r", True)
+        self.rt = _read("rt", True)
 
         # Fetch flow solution if it exists
         # get_bp returns NaNs of correct shape otherwise
-        self.ro = g.get_bp("ro", bid, raise_missing=False)[
-            ist:ien, jst:jen, kst:ken
-        ]
-        self.rovx = g.get_bp("rovx", bid, raise_missing=False)[
-            ist:ien, jst:jen, kst:ken
-        ]
-        self.rovr = g.get_bp("rovr", bid, raise_missing=False)[
-            ist:ien, jst:jen, kst:ken
-        ]
-        self.rorvt = g.get_bp("rorvt", bid, raise_missing=False)[
-            ist:ien, jst:jen, kst:ken
-        ]
-        self.roe = g.get_bp("roe", bid, raise_missing=False)[
-            ist:ien, jst:jen, kst:ken
-        ]
+        self.ro = _read("ro", False)
+        self.rovx = _read("rovx", False)
+        self.rovr = _read("rovr", False)
+        self.rorvt = _read("rorvt", False)
+        self.roe = _read("roe", False)
+
+    @_derived
+    def t(self):
+        """Circumferential angle."""
+        # Divide in double precision, without upcasting the inputs first
+        return np.divide(self.rt, self.r, dtype=np.float64).astype(
+            np.result_type(self.r, np.float32)
+        )
 
-        # Reduce to a 2D array if requested
-        if squeeze:
+    # Divide out density
 
-            self.x = np.squeeze(self.x)
-            self.r = np.squeeze(self.r)
-            self.rt = np.squeeze(self.rt)
+    @_derived
+    def vx(self):
+        """Axial velocity."""
+        return self.rovx / self.ro
 
-            self.ro = np.squeeze(self.ro)
-            self.rovx = np.squeeze(self.rovx)
-            self.rovr = np.squeeze(self.rovr)
-            self.rorvt = np.squeeze(self.rorvt)
-            self.roe = np.squeeze(self.roe)
+    @_derived
+    def vr(self):
+        """Radial velocity."""
+        return self.rovr / self.ro
 
-        self.t = (
-            self.rt.astype(np.float64) / self.r.astype(np.float64)
-        ).astype(np.float32)
+    @_derived
+    def vt(self):
+        """Tangential velocity."""
+        return self.rorvt / self.ro / self.r
 
-        # Divide out density
-        self.vx = self.rovx / self.ro
-        self.vr = self.rovr / self.ro
-        self.vt = self.rorvt / self.ro / self.r
-        e = self.roe / self.ro
+    # Velocities
 
-        # Velocities
-        self.vsq = self.vx ** 2.0 + self.vr ** 2.0 + self.vt ** 2.0
-        self.U = self.r * self.Omega
-        self.vt_rel = self.vt - self.U
-        self.vsq_rel = (
-            self.vx ** 2.0 + self.vr ** 2.0 + self.vt_rel ** 2.0
-        )
+    @_derived
+    def vsq(self):
+        """Square of absolute velocity."""
+        return self.vx ** 2.0 + self.vr ** 2.0 + self.vt ** 2.0
 
-        # Pressure and temperature
-        cv = self.cp / self.ga
-        self.tstat = (e - 0.5 * self.vsq) / cv
-        self.pstat = self.ro * self.rgas * self.tstat
+    @_derived
+    def U(self):
+        """Blade speed."""
+        return self.r * self.Omega
 
-        # Mach
-        self.mach = np.sqrt(self.vsq / self.ga / self.rgas / self.tstat)
-        self.mach_rel = np.sqrt(
-            self.vsq_rel / self.ga / self.rgas / self.tstat
-        )
+    @_derived
+    def vt_rel(self):
+        """Relative tangential velocity."""
+        return self.vt - self.U
 
-        # Stagnation pressures and temperatures
-        self.pstag = self.pstat * compflow.Po_P_from_Ma(
-            self.mach, self.ga
-        )
-        self.tstag = self.tstat * compflow.To_T_from_Ma(
-            self.mach, self.ga
-        )
-        self.pstag_rel = self.pstat * compflow.Po_P_from_Ma(
-            self.mach_rel, self.ga
-        )
-        self.tstag_rel = self.tstat * compflow.To_T_from_Ma(
-            self.mach_rel, self.ga
-        )
+    @_derived
+    def vsq_rel(self):
+        """Square of relative velocity."""
+        return self.vx ** 2.0 + self.vr ** 2.0 + self.vt_rel ** 2.0
+
+    # Pressure and temperature
 
-        # Span fraction
+    @_derived
+    def tstat(self):
+        """Static temperature."""
+        cv = self.cp / self.ga
+        e = self.roe / self.ro
+        return (e - 0.5 * self.vsq) / cv
+
+    @_derived
+    def pstat(self):
+        """Static pressure."""
+        return self.ro * self.rgas * self.tstat
+
+    # Mach
+
+    @_derived
+    def mach(self):
+        """Absolute Mach number."""
+        return np.sqrt(self.vsq / self.ga / self.rgas / self.tstat)
+
+    @_derived
+    def mach_rel(self):
+        """Relative Mach number."""
+        return np.sqrt(self.vsq_rel / self.ga / self.rgas / self.tstat)
+
+    # Stagnation pressures and temperatures
+
+    @_derived
+    def _stag_ratios(self):
+        # To_T and Po_P in the absolute frame
+        return compflow.stagnation_ratios(self.mach, self.ga)[:2]
+
+    @_derived
+    def _stag_ratios_rel(self):
+        # To_T and Po_P in the relative frame
+        return compflow.stagnation_ratios(self.mach_rel, self.ga)[:2]
+
+    @_derived
+    def pstag(self):
+        """Stagnation pressure."""
+        return self.pstat * self._stag_ratios[1]
+
+    @_derived
+    def tstag(self):
+        """Stagnation temperature."""
+        return self.tstat * self._stag_ratios[0]
+
+    @_derived
+    def pstag_rel(self):
+        """Relative stagnation pressure."""
+        return self.pstat * self._stag_ratios_rel[1]
+
+    @_derived
+    def tstag_rel(self):
+        """Relative stagnation temperature."""
+        return self.tstat * self._stag_ratios_rel[0]
+
+    @_derived
+    def spf(self):
+        """Span fraction."""
         if (self.r.ptp(axis=1) > 0.0).all():
-            self.spf = (
+            return (
                 self.r - self.r.min(axis=1, keepdims=True)
             ) / self.r.ptp(axis=1, keepdims=True)
         else:
-            self.spf = np.ones_like(self.r) * np.nan
+            return np.ones_like(self.r) * np.nan
 
-        # Cartesian coordinates
-        self.y = self.r * np.sin(self.t)
-        self.z = self.r * np.cos(self.t)
+    # Cartesian coordinates
+
+    @_derived
+    def y(self):
+        """Cartesian y coordinate."""
+        return self.r * np.sin(self.t)
+
+    @_derived
+    def z(self):
+        """Cartesian z coordinate."""
+        return self.r * np.cos(self.t)
 
     def mix_out(self):
         """Take a structured cuts and mix out the flow at constant area."""
@@ -713,15 +838,11 @@ class Cut:
         )
 
         cut_out.mach = cut_out.vabs / np.sqrt(ga * rgas * cut_out.tstat)
-        cut_out.pstag = (
-            compflow.Po_P_from_Ma(cut_out.mach, ga) * cut_out.pstat
-        )
-        cut_out.pstag_rel = (
-            compflow.Po_P_from_Ma(cut_out.mach_rel, ga) * cut_out.pstat
-        )
-        cut_out.tstag = (
-            compflow.To_T_from_Ma(cut_out.mach, ga) * cut_out.tstat
-        )
+        To_T, Po_P = compflow.stagnation_ratios(cut_out.mach, ga)[:2]
+        cut_out.pstag = Po_P * cut_out.pstat
+        cut_out.tstag = To_T * cut_out.tstat
+        Po_P_rel = compflow.stagnation_ratios(cut_out.mach_rel, ga)[1]
+        cut_out.pstag_rel = Po_P_rel * cut_out.pstat
 
         cut_out.yaw = np.degrees(np.arctan2(cut_out.vt, cut_out.vx))
         cut_out.yaw_rel = np.degrees(
@@ -1067,9 +1188,8 @@ class Grid(TstreamGrid):
                     % (name, bid)
                 )
             else:
-                bp = (
-                    np.ones_like(TstreamGrid.get_bp(self, "x", bid))
-                    * np.nan
+                bp = np.full_like(
+                    TstreamGrid.get_bp(self, "x", bid), np.nan
                 )
 
         return np.swapaxes(bp,0,2)
@@ -1094,7 +1214,9 @@ class Grid(TstreamGrid):
     # Patching
     #
 
-    def cut_patch(self, bid, pid, squeeze=True, offset=0):
+    def cut_patch(
+        self, bid, pid, squeeze=True, offset=0, dtype=None, copy=False
+    ):
         """Structured cut a patch from grid."""
         P = self.get_patch(bid, pid)
 
@@ -1135,7 +1257,9 @@ class Grid(TstreamGrid):
                     "Cannot offset patch cut, no thin dimension!"
                 )
 
-        return Cut(self, bid, ist, ien, jst, jen, kst, ken, squeeze)
+        return Cut(
+            self, bid, ist, ien, jst, jen, kst, ken, squeeze, dtype, copy
+        )
 
     def find_patches(self, kind=None):
         """Return block and patch ids of all patches of a given kind."""
@@ -1206,14 +1330,15 @@ class Grid(TstreamGrid):
         Alb = np.interp(xb, x, Al)
 
         # Get velocities
-        Vb = compflow.V_cpTo_from_Ma(Mab, ga) * np.sqrt(cp * Tob)
+        To_Tb, Po_Pb, _, V_cpTob, _ = compflow.stagnation_ratios(Mab, ga)
+        Vb = V_cpTob * np.sqrt(cp * Tob)
         Vxb = Vb * np.cos(np.radians(Alb))
         Vtb = Vb * np.sin(np.radians(Alb))
         Vrb = np.zeros_like(Vb)
 
         # Static pressure and temperature
-        Pb = Pob / compflow.Po_P_from_Ma(Mab, ga)
-        Tb = Tob / compflow.To_T_from_Ma(Mab, ga)
+        Pb = Pob / Po_Pb
+        Tb = Tob / To_Tb
 
         # Density
         rob = Pb / rgas / Tb
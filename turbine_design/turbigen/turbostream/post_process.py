@@ -40,17 +40,14 @@ def _get_AR(C):
 def node_to_face(cut, prop_name):
     """For a (n,m) matrix of some property, average over the four corners of
     each face to produce an (n-1,m-1) matrix of face-centered properties."""
-    return np.mean(
-        np.stack(
-            (
-                getattr(cut, prop_name)[:-1, :-1].astype(float),
-                getattr(cut, prop_name)[1:, 1:].astype(float),
-                getattr(cut, prop_name)[:-1, 1:].astype(float),
-                getattr(cut, prop_name)[1:, :-1].astype(float),
-            )
-        ),
-        axis=0,
-    )
+    # Accumulate the corner views in double precision, without copying them
+    var = getattr(cut, prop_name)
+    face = var[:-1, :-1].astype(float)
+    face += var[1:, 1:]
+    face += var[:-1, 1:]
+    face += var[1:, :-1]
+    face *= 0.25
+    return face
 
 
 def face_length_vec(c):
@@ -139,9 +136,10 @@ def mix_out(cut):
     cut_out.mach_rel = cut_out.vabs_rel / np.sqrt(ga * rgas * cut_out.tstat)
 
     cut_out.mach = cut_out.vabs / np.sqrt(ga * rgas * cut_out.tstat)
-    cut_out.pstag = compflow.Po_P_from_Ma(cut_out.mach, ga) * cut_out.pstat
-    cut_out.pstag_rel = compflow.Po_P_from_Ma(cut_out.mach_rel, ga) * cut_out.pstat
-    cut_out.tstag = compflow.To_T_from_Ma(cut_out.mach, ga) * cut_out.tstat
+    To_T, Po_P = compflow.stagnation_ratios(cut_out.mach, ga)[:2]
+    cut_out.pstag = Po_P * cut_out.pstat
+    cut_out.pstag_rel = compflow.stagnation_ratios(cut_out.mach_rel, ga)[1] * cut_out.pstat
+    cut_out.tstag = To_T * cut_out.tstat
 
     cut_out.yaw = np.degrees(np.arctan2(cut_out.vt, cut_out.vx))
     cut_out.yaw_rel = np.degrees(np.arctan2(cut_out.vt_rel, cut_out.vx))
@@ -26,17 +26,13 @@ def save_meta(meta, basedir):
 
 
 def node_to_cell(cut, prop_name):
-    return np.mean(
-        np.stack(
-            (
-                getattr(cut, prop_name)[:-1, :-1],
-                getattr(cut, prop_name)[1:, 1:],
-                getattr(cut, prop_name)[:-1, 1:],
-                getattr(cut, prop_name)[1:, :-1],
-            )
-        ),
-        axis=0,
-    )
+    # Sum the corner views in place, without stacking copies of them
+    var = getattr(cut, prop_name)
+    cell = var[:-1, :-1] + var[1:, 1:]
+    cell += var[:-1, 1:]
+    cell += var[1:, :-1]
+    cell *= 0.25
+    return cell
 
 
 def cell_vec(c):
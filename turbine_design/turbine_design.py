@@ -4,18 +4,22 @@ from sklearn.metrics import mean_squared_error
 import numpy as np
 import pandas as pd
 import scipy.stats as st
+from scipy.linalg import solve_triangular
+from scipy.optimize import minimize
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcol
 from collections import OrderedDict
 import sys,os
+import copy
+import functools
+import threading
+import hashlib
 import joblib
 from . import compflow_native as compflow
 import json
-from .get_shape import get_coordinates
-from stl import mesh
+from .get_shape import get_shape, get_shapes
+from .turbigen.three_dimensional_stage import StageParameterSet
 import pkg_resources
-from tkinter import filedialog
-import tkinter as tk
 
 import warnings
 warnings.filterwarnings("ignore")
@@ -133,12 +137,582 @@ def drop_columns(df,variables,output_key):
    Returns:
        Pandas DataFrame: Pandas DataFrame with appropriate columns removed
    """
-   for dataframe_variable in df.columns:
-      if (dataframe_variable in variables) or (dataframe_variable==output_key):
-         pass
+   extra_columns = [dataframe_variable for dataframe_variable in df.columns
+                    if (dataframe_variable not in variables) and (dataframe_variable!=output_key)]
+   return df.drop(columns=extra_columns)
+
+class GPR_model_registry:
+   """Process-wide cache of fitted GPR models stored in the package 'Models' folder.
+
+   Each model is loaded from disk the first time it is requested and shared by
+   every subsequent turbine_GPR built with the same name. Loaded models are kept
+   in least-recently-used order, and the oldest are evicted once their combined
+   size exceeds the memory limit. All methods are thread-safe.
+   
+   Models saved in the compact format (see compact_GPR_model) are memory-mapped
+   in preference to unpickling the joblib file.
+   """
+   
+   def __init__(self,
+                memory_limit=None,
+                mmap_mode='r'):
+      """_summary_
+
+      Args:
+          memory_limit (int, optional): Maximum combined size of the cached models in bytes. None means no limit. Defaults to None.
+          mmap_mode (str, optional): Memory-map mode for compact models, passed to np.load. None reads them into memory. Defaults to 'r'.
+      """
+      self.package_path = pkg_resources.resource_filename('turbine_design','')
+      self.models_subfolder_path = '/'.join((self.package_path, 'Models'))
+      
+      self.memory_limit = memory_limit
+      self.mmap_mode = mmap_mode
+      self.nbytes = 0
+      
+      self._models = OrderedDict()
+      self._lock = threading.Lock()
+      self._load_locks = {}
+      
+   def __contains__(self,model_name):
+      with self._lock:
+         return model_name in self._models
+      
+   def __len__(self):
+      with self._lock:
+         return len(self._models)
+      
+   @property
+   def loaded_models(self):
+      """list[str]: Names of the cached models, least recently used first."""
+      with self._lock:
+         return list(self._models)
+      
+   def get(self,model_name):
+      """Return the cached entry for a model, loading it from disk if required.
+
+      Args:
+          model_name (str): Name of the model folder in 'Models'.
+
+      Raises:
+          FileNotFoundError: If no model of that name has been saved.
+
+      Returns:
+          dict: Model entry with keys 'variables', 'output_key', 'fitted_function', 'input_array_train', 'output_array_train', 'limit_dict', 'nbytes', 'X_train_hash' and 'kernel_key'.
+      """
+      with self._lock:
+         if model_name in self._models:
+            self._models.move_to_end(model_name)
+            return self._models[model_name]
+         load_lock = self._load_locks.setdefault(model_name,threading.Lock())
+      
+      # only one thread loads a given model, others wait for it and reuse the result
+      with load_lock:
+         with self._lock:
+            if model_name in self._models:
+               self._models.move_to_end(model_name)
+               return self._models[model_name]
+         
+         model_entry = self._load(model_name)
+         
+         with self._lock:
+            self._models[model_name] = model_entry
+            self.nbytes += model_entry['nbytes']
+            self._evict()
+            self._load_locks.pop(model_name,None)
+            
+      return model_entry
+   
+   def set_memory_limit(self,memory_limit):
+      """Set the maximum combined size of the cached models, evicting models if necessary.
+
+      Args:
+          memory_limit (int): Memory limit in bytes. None means no limit.
+      """
+      with self._lock:
+         self.memory_limit = memory_limit
+         self._evict()
+         
+   def discard(self,model_name):
+      """Remove a model from the cache, so it is reloaded from disk the next time it is requested.
+
+      Args:
+          model_name (str): Name of the model.
+      """
+      with self._lock:
+         model_entry = self._models.pop(model_name,None)
+         if model_entry is not None:
+            self.nbytes -= model_entry['nbytes']
+            
+   def clear(self):
+      """Remove all models from the cache."""
+      with self._lock:
+         self._models.clear()
+         self.nbytes = 0
+         
+   def export_compact(self,model_names=None):
+      """Write the compact format alongside the joblib file of saved models.
+
+      Args:
+          model_names (list[str], optional): Names of the models to export. None exports every model in 'Models'. Defaults to None.
+      """
+      if model_names is None:
+         model_names = sorted([model_name for model_name in os.listdir(self.models_subfolder_path)
+                               if os.path.isfile(f'{self.models_subfolder_path}/{model_name}/{model_name}.joblib')])
+      
+      for model_name in model_names:
+         variables, output_key = self._read_model_variables(model_name)
+         model = joblib.load(f'{self.models_subfolder_path}/{model_name}/{model_name}.joblib')
+         try:
+            save_compact_model(model,
+                               f'{self.models_subfolder_path}/{model_name}/compact',
+                               variables,
+                               output_key)
+         except ValueError as error:
+            warnings.warn(f'{model_name} not exported: {error}')
+         self.discard(model_name)
+   
+   def _evict(self):
+      # always keep the most recently used model, even if it alone exceeds the limit
+      while (self.memory_limit is not None) and (self.nbytes > self.memory_limit) and (len(self._models) > 1):
+         _, model_entry = self._models.popitem(last=False)
+         self.nbytes -= model_entry['nbytes']
+   
+   def _read_model_variables(self,model_name):
+      with open(f"{self.models_subfolder_path}/{model_name}/{model_name}_variables.txt", "r") as file:
+         variables = [line.rstrip() for line in file]
+         
+      with open(f"{self.models_subfolder_path}/{model_name}/{model_name}_output_variable.txt", "r") as file:
+         output_key = [line.rstrip() for line in file][0]
+         
+      return variables, output_key
+   
+   def _load(self,model_name):
+      variables, output_key = self._read_model_variables(model_name)
+      
+      compact_path = f'{self.models_subfolder_path}/{model_name}/compact'
+      if os.path.isfile(f'{compact_path}/meta.json'):
+         model = load_compact_model(compact_path,mmap_mode=self.mmap_mode)
       else:
-         df=df.drop(columns=str(dataframe_variable))
-   return df
+         model = joblib.load(f'{self.models_subfolder_path}/{model_name}/{model_name}.joblib')
+      
+      input_array_train = pd.DataFrame(data=model.X_train_,
+                                       columns=sorted(variables))
+      
+      output_array_train = pd.DataFrame(data=model.y_train_,
+                                        columns=[output_key])
+      
+      limit_dict = {}
+      for column in input_array_train:
+         limit_dict[column] = (np.around(input_array_train[column].min(),decimals=1),
+                               np.around(input_array_train[column].max(),decimals=1)
+                               )
+      
+      nbytes = sum([value.nbytes for value in vars(model).values() if isinstance(value,np.ndarray)])
+      
+      # sparse models evaluate the kernel against their inducing points rather than the training data
+      X_train_hash = hashlib.sha1(np.ascontiguousarray(getattr(model,'X_inducing_',model.X_train_)).tobytes()).hexdigest()
+      
+      return {'variables':variables,
+              'output_key':output_key,
+              'fitted_function':model,
+              'input_array_train':input_array_train,
+              'output_array_train':output_array_train,
+              'limit_dict':limit_dict,
+              'nbytes':nbytes,
+              'X_train_hash':X_train_hash,
+              'kernel_key':kernel_key(model.kernel_)}
+
+def kernel_key(kernel):
+   """Hashable key identifying a kernel's form and hyperparameters.
+
+   Args:
+       kernel (sklearn kernel): Kernel, e.g. the optimised kernel of a fitted model.
+
+   Returns:
+       tuple: Key that is equal for kernels that evaluate identically.
+   """
+   scalar_params = [(name,value) for name,value in kernel.get_params().items() if np.isscalar(value)]
+   return (repr(type(kernel)),
+           np.asarray(kernel.theta).tobytes(),
+           tuple(sorted(scalar_params,key=lambda item: item[0])))
+
+class compact_GPR_model:
+   """Fitted GPR model read from the compact on-disk format, predicting with NumPy alone.
+
+   The format is a directory of .npy files holding the training data, the
+   precomputed alpha and the Cholesky factor of the training covariance, with
+   the kernel hyperparameters and variable names in meta.json. The arrays are
+   memory-mapped read-only by default, so worker processes forked after loading
+   share one copy of them. Only a Matern kernel, optionally plus a WhiteKernel,
+   can be stored. Attribute names follow GaussianProcessRegressor, so a compact
+   model can be used in place of a fitted one for prediction.
+   """
+   
+   model_type = 'exact'
+   array_names = ['X_train_','y_train_','alpha_','L_']
+   
+   def __init__(self,
+                directory,
+                mmap_mode='r'):
+      """_summary_
+
+      Args:
+          directory (str): Directory written by save_compact_model.
+          mmap_mode (str, optional): Memory-map mode passed to np.load. None reads the arrays into memory. Defaults to 'r'.
+      """
+      with open(f'{directory}/meta.json','r') as file:
+         meta = json.load(file)
+         
+      arrays = {array_name:np.load(f'{directory}/{array_name}.npy',mmap_mode=mmap_mode) for array_name in self.array_names}
+      
+      self._set_state(arrays,meta)
+      
+   @classmethod
+   def from_fitted(cls,model,variables,output_key):
+      """Compact model sharing the arrays of a fitted GaussianProcessRegressor, without writing to disk.
+
+      Args:
+          model (GaussianProcessRegressor): Fitted model with a Matern kernel, optionally plus a WhiteKernel.
+          variables (list[str]): Input variables of the model.
+          output_key (str): Output variable of the model.
+
+      Raises:
+          ValueError: If the model's kernel cannot be stored.
+
+      Returns:
+          compact_GPR_model: Compact model.
+      """
+      compact_model = cls.__new__(cls)
+      compact_model._set_state({array_name:getattr(model,array_name) for array_name in cls.array_names},
+                               compact_model_meta(model,variables,output_key))
+      return compact_model
+      
+   def _set_state(self,arrays,meta):
+      for array_name in self.array_names:
+         setattr(self,array_name,arrays[array_name])
+      
+      self.variables = meta['variables']
+      self.output_key = meta['output_key']
+      self.length_scale = np.asarray(meta['length_scale'],dtype=float)
+      self.length_scale_bounds = meta['length_scale_bounds']
+      self.nu = float(meta['nu'])
+      self.noise_level = meta['noise_level']
+      self.noise_level_bounds = meta['noise_level_bounds']
+      self._y_train_mean = meta['y_train_mean']
+      self._y_train_std = meta['y_train_std']
+      self.log_marginal_likelihood_value_ = meta['log_marginal_likelihood_value']
+      
+      self._kernel = None
+      self._cast_arrays = {}
+      
+   def _meta(self):
+      # contents of meta.json for this model
+      return {'model_type':self.model_type,
+              'variables':list(self.variables),
+              'output_key':self.output_key,
+              'length_scale':self.length_scale.tolist(),
+              'length_scale_bounds':self.length_scale_bounds,
+              'nu':self.nu,
+              'noise_level':self.noise_level,
+              'noise_level_bounds':self.noise_level_bounds,
+              'y_train_mean':self._y_train_mean,
+              'y_train_std':self._y_train_std,
+              'log_marginal_likelihood_value':float(self.log_marginal_likelihood_value_)}
+      
+   def _kernel_points(self):
+      # points that the cross kernel is evaluated against
+      return self.X_train_
+      
+   @property
+   def kernel_(self):
+      """sklearn kernel with the stored hyperparameters, built on first use."""
+      if self._kernel is None:
+         kernel = kernels.Matern(length_scale=self.length_scale if self.length_scale.ndim else float(self.length_scale),
+                                 length_scale_bounds=self.length_scale_bounds,
+                                 nu=self.nu)
+         if self.noise_level is not None:
+            kernel = kernel + kernels.WhiteKernel(noise_level=self.noise_level,
+                                                  noise_level_bounds=self.noise_level_bounds)
+         self._kernel = kernel
+      return self._kernel
+   
+   def _arrays_as(self,dtype):
+      # scaled training inputs in the working precision, computed once per dtype
+      dtype = np.dtype(dtype)
+      if dtype not in self._cast_arrays:
+         length_scale = self.length_scale.astype(dtype)
+         X_train_scaled = np.asarray(self._kernel_points(),dtype=dtype)/length_scale
+         self._cast_arrays[dtype] = {'length_scale':length_scale,
+                                     'X_train_scaled':X_train_scaled,
+                                     'X_train_sq_norms':np.sum(X_train_scaled**2,axis=1)}
+      return self._cast_arrays[dtype]
+   
+   def cross_kernel(self,
+                    X,
+                    dtype=np.float64):
+      """Covariance between input points and the training points.
+
+      Args:
+          X (numpy array): Input points, with one column per variable in sorted variable order.
+          dtype (numpy dtype, optional): Precision to evaluate the kernel function in. Squared distances are always calculated in float64. Defaults to np.float64.
+
+      Returns:
+          numpy array: Covariance matrix with one row per input point and one column per training point.
+      """
+      if self.nu not in [0.5,1.5,2.5,np.inf]:
+         return self.kernel_(X,self._kernel_points()).astype(dtype,copy=False)
+      
+      # the expanded squared distance cancels badly for nearby points, so it is always formed in float64 and only the kernel function uses dtype
+      cast_arrays = self._arrays_as(np.float64)
+      
+      X_scaled = np.asarray(X,dtype=np.float64)/cast_arrays['length_scale']
+      sq_dists = np.sum(X_scaled**2,axis=1)[:,None] + cast_arrays['X_train_sq_norms'][None,:] - 2*(X_scaled @ cast_arrays['X_train_scaled'].T)
+      sq_dists = np.maximum(sq_dists,0.0).astype(dtype,copy=False)
+      
+      with np.errstate(under='ignore'):
+         if self.nu == 0.5:
+            K = np.exp(-np.sqrt(sq_dists))
+         elif self.nu == 1.5:
+            K = np.sqrt(3*sq_dists)
+            K = (1.0 + K)*np.exp(-K)
+         elif self.nu == 2.5:
+            K = np.sqrt(5*sq_dists)
+            K = (1.0 + K + K**2/3.0)*np.exp(-K)
+         else:
+            K = np.exp(-0.5*sq_dists)
+      
+      return K
+   
+   def predict(self,
+               X,
+               return_std=False,
+               dtype=np.float64):
+      """Mean, and optionally standard deviation, of the predicted output.
+
+      Args:
+          X (numpy array): Input points, with one column per variable in sorted variable order.
+          return_std (bool, optional): Also return the standard deviation. Defaults to False.
+          dtype (numpy dtype, optional): Precision to evaluate the kernel in. The weighted sum giving the mean and the standard deviation are always calculated in float64, as the weights alpha_ can be large. Defaults to np.float64.
+
+      Returns:
+          numpy array or tuple: Mean prediction, or (mean, std) if return_std is True.
+      """
+      K_trans = self.cross_kernel(X,dtype=dtype)
+      # float32 accumulation over large alpha_ loses several percent of the output range, so contract in float64
+      y_mean = np.dot(K_trans,np.asarray(self.alpha_,dtype=np.float64))*self._y_train_std + self._y_train_mean
+      
+      if not return_std:
+         return y_mean
+      
+      y_var = self._predictive_variance(K_trans.astype(np.float64,copy=False))
+      y_std = np.sqrt(np.maximum(y_var,0.0))*self._y_train_std
+      
+      return y_mean, y_std
+   
+   def _predictive_variance(self,K_trans):
+      # variance of the normalised output, with the Matern kernel's unit variance on the diagonal
+      V = solve_triangular(self.L_,K_trans.T,lower=True,check_finite=False)
+      return 1.0 + (self.noise_level or 0.0) - np.einsum('ij,ij->j',V,V)
+   
+   def score(self,X,y):
+      """Coefficient of determination of the mean prediction.
+
+      Args:
+          X (numpy array): Input points, with one column per variable in sorted variable order.
+          y (numpy array): True outputs.
+
+      Returns:
+          float: R^2 score.
+      """
+      y = np.asarray(y,dtype=float)
+      residual_sum_squares = np.sum((y - self.predict(X))**2)
+      total_sum_squares = np.sum((y - np.mean(y))**2)
+      return 1.0 - residual_sum_squares/total_sum_squares
+
+class sparse_GPR_model(compact_GPR_model):
+   """Inducing-point GPR model, using the variational free energy (VFE) approximation.
+
+   Every training point contributes to the prediction through m inducing
+   points, so training costs O(n m^2) rather than O(n^3). The mean costs O(m)
+   per query point and the variance O(m^2). alpha_ holds the weights of the
+   inducing points and M_ the matrix of the variance correction, both
+   precomputed. The kernel hyperparameters are taken from an exact GP fitted
+   to the inducing points. Saved and loaded in the compact format like
+   compact_GPR_model.
+   """
+   
+   model_type = 'sparse'
+   array_names = ['X_train_','y_train_','X_inducing_','alpha_','M_']
+   
+   @classmethod
+   def from_subset_fit(cls,model,X_train,y_train,inducing_indices,variables,output_key):
+      """Sparse model over all the training data, with hyperparameters and inducing points from an exact fit to a subset.
+
+      Args:
+          model (GaussianProcessRegressor): Exact model fitted to X_train[inducing_indices], with a Matern kernel, optionally plus a WhiteKernel.
+          X_train (numpy array): All training inputs, with one column per variable in sorted variable order.
+          y_train (numpy array): All training outputs.
+          inducing_indices (numpy array): Rows of X_train used as inducing points.
+          variables (list[str]): Input variables of the model.
+          output_key (str): Output variable of the model.
+
+      Raises:
+          ValueError: If the model's kernel cannot be stored.
+
+      Returns:
+          sparse_GPR_model: Sparse model.
+      """
+      meta = compact_model_meta(model,variables,output_key)
+      
+      kernel = model.kernel_
+      matern_kernel = kernel if meta['noise_level'] is None else kernel.k1
+      noise_variance = (meta['noise_level'] or 0.0) + getattr(model,'alpha',1e-10)
+      
+      X_train = np.asarray(X_train,dtype=float)
+      y_train = (np.asarray(y_train,dtype=float) - meta['y_train_mean'])/meta['y_train_std']
+      X_inducing = X_train[inducing_indices]
+      n_train, n_inducing = len(X_train), len(X_inducing)
+      identity = np.eye(n_inducing)
+      
+      K_mm = matern_kernel(X_inducing)
+      K_mm[np.diag_indices_from(K_mm)] += 1e-8
+      L_m = np.linalg.cholesky(K_mm)
+      
+      # A = L_m^-1 K_mn / sigma, so that Q_nn + sigma^2 I = sigma^2 (I + A^T A)
+      A = solve_triangular(L_m,matern_kernel(X_inducing,X_train),lower=True,check_finite=False)/np.sqrt(noise_variance)
+      L_B = np.linalg.cholesky(identity + A @ A.T)
+      c = solve_triangular(L_B,A @ y_train,lower=True,check_finite=False)/np.sqrt(noise_variance)
+      
+      alpha = solve_triangular(L_m,solve_triangular(L_B,c,lower=True,trans='T',check_finite=False),lower=True,trans='T',check_finite=False)
+      
+      L_m_inv = solve_triangular(L_m,identity,lower=True,check_finite=False)
+      L_B_inv = solve_triangular(L_B,identity,lower=True,check_finite=False)
+      M = L_m_inv.T @ (L_B_inv.T @ L_B_inv - identity) @ L_m_inv
+      
+      # VFE bound: log N(y | 0, Q_nn + sigma^2 I) - tr(K_nn - Q_nn)/(2 sigma^2)
+      meta['log_marginal_likelihood_value'] = float(-0.5*n_train*np.log(2*np.pi*noise_variance)
+                                                    - np.sum(np.log(np.diag(L_B)))
+                                                    - 0.5*(y_train @ y_train)/noise_variance
+                                                    + 0.5*(c @ c)
+                                                    - 0.5*(n_train - noise_variance*np.sum(A**2))/noise_variance)
+      meta['model_type'] = cls.model_type
+      
+      sparse_model = cls.__new__(cls)
+      sparse_model._set_state({'X_train_':X_train,
+                               'y_train_':y_train,
+                               'X_inducing_':X_inducing,
+                               'alpha_':alpha,
+                               'M_':M},
+                              meta)
+      return sparse_model
+   
+   def _kernel_points(self):
+      return self.X_inducing_
+   
+   def _predictive_variance(self,K_trans):
+      return 1.0 + (self.noise_level or 0.0) + np.einsum('ij,ij->i',K_trans @ self.M_,K_trans)
+
+def load_compact_model(directory,mmap_mode='r'):
+   """Load a model saved in the compact format, as a compact_GPR_model or sparse_GPR_model.
+
+   Args:
+       directory (str): Directory written by save_compact_model.
+       mmap_mode (str, optional): Memory-map mode passed to np.load. None reads the arrays into memory. Defaults to 'r'.
+
+   Returns:
+       compact_GPR_model: Loaded model.
+   """
+   with open(f'{directory}/meta.json','r') as file:
+      model_type = json.load(file).get('model_type','exact')
+      
+   if model_type == sparse_GPR_model.model_type:
+      return sparse_GPR_model(directory,mmap_mode=mmap_mode)
+   else:
+      return compact_GPR_model(directory,mmap_mode=mmap_mode)
+
+def compact_model_meta(model,variables,output_key):
+   """Hyperparameters and metadata of a fitted GaussianProcessRegressor, as stored in the compact format's meta.json.
+
+   Args:
+       model (GaussianProcessRegressor): Fitted model with a Matern kernel, optionally plus a WhiteKernel.
+       variables (list[str]): Input variables of the model.
+       output_key (str): Output variable of the model.
+
+   Raises:
+       ValueError: If the model's kernel cannot be stored.
+
+   Returns:
+       dict: JSON-serialisable metadata.
+   """
+   kernel = model.kernel_
+   if isinstance(kernel,kernels.Sum) and isinstance(kernel.k2,kernels.WhiteKernel):
+      matern_kernel, noise_kernel = kernel.k1, kernel.k2
+   else:
+      matern_kernel, noise_kernel = kernel, None
+      
+   if not isinstance(matern_kernel,kernels.Matern):
+      raise ValueError('only a Matern kernel, optionally plus a WhiteKernel, can be saved in the compact format')
+   
+   def to_json(value):
+      return value if isinstance(value,str) else np.asarray(value,dtype=float).tolist()
+   
+   meta = {'model_type':compact_GPR_model.model_type,
+           'variables':list(variables),
+           'output_key':output_key,
+           'length_scale':to_json(matern_kernel.length_scale),
+           'length_scale_bounds':to_json(matern_kernel.length_scale_bounds),
+           'nu':float(matern_kernel.nu),
+           'noise_level':None if noise_kernel is None else float(noise_kernel.noise_level),
+           'noise_level_bounds':None if noise_kernel is None else to_json(noise_kernel.noise_level_bounds),
+           'y_train_mean':float(np.ravel(getattr(model,'_y_train_mean',0.0))[0]),
+           'y_train_std':float(np.ravel(getattr(model,'_y_train_std',1.0))[0]),
+           'log_marginal_likelihood_value':float(model.log_marginal_likelihood_value_)}
+   
+   return meta
+
+def save_compact_model(model,directory,variables,output_key):
+   """Write a fitted model in the format read by load_compact_model.
+
+   Args:
+       model (GaussianProcessRegressor or compact_GPR_model): Fitted model. A GaussianProcessRegressor must have a Matern kernel, optionally plus a WhiteKernel.
+       directory (str): Directory to write to, created if necessary.
+       variables (list[str]): Input variables of the model.
+       output_key (str): Output variable of the model.
+
+   Raises:
+       ValueError: If the model's kernel cannot be stored.
+   """
+   if isinstance(model,compact_GPR_model):
+      meta = model._meta()
+      array_names = model.array_names
+   else:
+      meta = compact_model_meta(model,variables,output_key)
+      array_names = compact_GPR_model.array_names
+   
+   os.makedirs(directory,exist_ok=True)
+   for array_name in array_names:
+      np.save(f'{directory}/{array_name}.npy',np.ascontiguousarray(getattr(model,array_name)))
+   
+   # meta.json marks the directory as complete, so it is written last
+   with open(f'{directory}/meta.json','w') as file:
+      json.dump(meta,file,indent=3)
+
+model_registry = GPR_model_registry()
+
+def _fit_gaussian_process(kernel,X,y):
+   """Fit a GaussianProcessRegressor from one starting kernel, without restarts. Module level so joblib can send it to worker processes.
+
+   Args:
+       kernel (kernels.Kernel): Starting kernel.
+       X (np.ndarray): Training inputs.
+       y (np.ndarray): Training outputs.
+
+   Returns:
+       GaussianProcessRegressor: Fitted regressor.
+   """
+   gaussian_process = GaussianProcessRegressor(kernel=kernel,
+                                               random_state=0)
+   return gaussian_process.fit(X,y)
 
 class turbine_GPR: 
    """_summary_
@@ -167,41 +741,31 @@ class turbine_GPR:
          
       else:   
          try:
-            with open(f"{self.models_subfolder_path}/{model_name}/{model_name}_variables.txt", "r") as file:
-               variables = [line.rstrip() for line in file]
-               
-            with open(f"{self.models_subfolder_path}/{model_name}/{model_name}_output_variable.txt", "r") as file:
-               self.output_key = [line.rstrip() for line in file][0]
-
-            self.variables = variables
-            self.fit_dimensions = len(self.variables)
-            
-            model = joblib.load(f'{self.models_subfolder_path}/{model_name}/{model_name}.joblib')
-            
-            self.input_array_train = pd.DataFrame(data=model.X_train_,
-                                                  columns=sorted(self.variables))
-            
-            self.output_array_train = pd.DataFrame(data=model.y_train_,
-                                                  columns=[self.output_key])
+            model_entry = model_registry.get(model_name)
+         except FileNotFoundError:
+            sys.exit(f'No model fitted named {model_name}')
             
-            if limit_dict=='auto':
-               self.limit_dict = {}
-               for column in self.input_array_train:
-                  self.limit_dict[column] = (np.around(self.input_array_train[column].min(),decimals=1),
-                                             np.around(self.input_array_train[column].max(),decimals=1)
-                                             )
-            else:
-               self.limit_dict = limit_dict
-               
-            self.optimised_kernel = model.kernel_
+         self.output_key = model_entry['output_key']
+         self.variables = list(model_entry['variables'])
+         self.fit_dimensions = len(self.variables)
+         
+         model = model_entry['fitted_function']
+         
+         self.input_array_train = model_entry['input_array_train']
+         self.output_array_train = model_entry['output_array_train']
+         
+         if limit_dict=='auto':
+            self.limit_dict = dict(model_entry['limit_dict'])
+         else:
+            self.limit_dict = limit_dict
             
-            self.fitted_function = model
-               
-            self.min_train_output = np.min([self.output_array_train])
-            self.max_train_output = np.max([self.output_array_train])
+         self.optimised_kernel = model.kernel_
+         
+         self.fitted_function = model
+         self.fitted_lml_per_point = model.log_marginal_likelihood_value_/len(model.X_train_)
             
-         except FileNotFoundError:
-            sys.exit(f'No model fitted named {model_name}')
+         self.min_train_output = np.min([self.output_array_train])
+         self.max_train_output = np.max([self.output_array_train])
    
    def fit(self,
            training_dataframe,
@@ -214,7 +778,9 @@ class turbine_GPR:
            nu='optimise',
            limit_dict='auto',
            save=False,
-           model_name=None
+           model_name=None,
+           n_jobs=1,
+           inducing_points=None
            ):
       """_summary_
 
@@ -229,6 +795,9 @@ class turbine_GPR:
           nu (str, optional): _description_. Defaults to 'optimise'.
           limit_dict (str, optional): _description_. Defaults to 'auto'.
           save (bool, optional): _description_. Defaults to False.
+          model_name (str, optional): Name to save the model under. Defaults to None.
+          n_jobs (int, optional): Number of worker processes to run the candidate nu fits and optimizer restarts over. None or -1 uses one per CPU. Defaults to 1.
+          inducing_points (int, optional): Fit a sparse_GPR_model with this many inducing points, chosen at random from the training data, if there are more training points than this. Defaults to None, which fits an exact GP.
       """
       
       if not isinstance(training_dataframe,pd.DataFrame):
@@ -263,6 +832,12 @@ class turbine_GPR:
       
       elif not isinstance(save,bool):
          sys.exit('save must be True or False')
+         
+      elif (n_jobs is not None) and (not isinstance(n_jobs,int)):
+         sys.exit('n_jobs must be an integer or None')
+         
+      elif (inducing_points is not None) and ((not isinstance(inducing_points,int)) or (inducing_points<1)):
+         sys.exit('inducing_points must be a positive integer or None')
       
       elif not all([(isinstance(item, int) or isinstance(item,float)) for item in length_bounds]) or (len(length_bounds)!=2):
          sys.exit('length_bounds must be of length 2 and contain only positive numbers')
@@ -312,30 +887,54 @@ class turbine_GPR:
       else:
          self.limit_dict = limit_dict
       
-      nu_dict = {1.5:None,2.5:None,np.inf:None}
-      
-      gaussian_process = GaussianProcessRegressor(kernel=kernel_form,
-                                                  n_restarts_optimizer=number_of_restarts,
-                                                  random_state=0
-                                                  )
-   
       if nu=='optimise':
-         for nui in nu_dict:
-            gaussian_process.set_params(kernel__k1__nu=nui)
-            fitted_function = gaussian_process.fit(self.input_array_train.to_numpy(),
-                                                   self.output_array_train.to_numpy()
-                                                   )
-            nu_dict[nui] = fitted_function.log_marginal_likelihood_value_
-
-         nu = max(nu_dict, key=nu_dict.get)
-
-      gaussian_process.set_params(kernel__k1__nu=nu)
-
-      self.fitted_function = gaussian_process.fit(self.input_array_train.to_numpy(),
-                                                  self.output_array_train.to_numpy()
-                                                  )
+         nu_list = [1.5,2.5,np.inf]
+      else:
+         nu_list = [nu]
+      
+      # Restart starting points, drawn as GaussianProcessRegressor does with random_state=0
+      rng = np.random.RandomState(0)
+      bounds = kernel_form.bounds
+      restart_thetas = [rng.uniform(bounds[:,0],bounds[:,1]) for i in range(number_of_restarts)]
+      
+      # Every candidate nu and restart is an independent fit
+      starting_kernels = []
+      for nui in nu_list:
+         kernel_nu = kernel_form.clone_with_theta(kernel_form.theta)
+         kernel_nu.set_params(k1__nu=nui)
+         starting_kernels.append(kernel_nu)
+         for theta in restart_thetas:
+            starting_kernels.append(kernel_nu.clone_with_theta(theta))
+      
+      X_train = self.input_array_train.to_numpy()
+      y_train = self.output_array_train.to_numpy()
+      
+      # a sparse model takes its hyperparameters from an exact fit to its inducing points
+      sparse = (inducing_points is not None) and (inducing_points < len(X_train))
+      if sparse == True:
+         inducing_indices = np.sort(np.random.RandomState(0).choice(len(X_train),inducing_points,replace=False))
+         X_fit, y_fit = X_train[inducing_indices], y_train[inducing_indices]
+      else:
+         X_fit, y_fit = X_train, y_train
+      
+      # joblib only treats None as all CPUs inside a parallel_config context
+      fitted_functions = joblib.Parallel(n_jobs=-1 if n_jobs is None else n_jobs)(
+         joblib.delayed(_fit_gaussian_process)(kernel,X_fit,y_fit) for kernel in starting_kernels
+         )
+      
+      self.fitted_function = max(fitted_functions,
+                                 key=lambda gp: gp.log_marginal_likelihood_value_)
+      
+      if sparse == True:
+         self.fitted_function = sparse_GPR_model.from_subset_fit(self.fitted_function,
+                                                                 X_train,
+                                                                 y_train,
+                                                                 inducing_indices,
+                                                                 variables,
+                                                                 self.output_key)
          
       self.optimised_kernel = self.fitted_function.kernel_
+      self.fitted_lml_per_point = self.fitted_function.log_marginal_likelihood_value_/len(self.fitted_function.X_train_)
       
       # self.input_array_train = training_dataframe.drop(columns=[self.output_key]) #preprocessing
       # self.output_array_train = training_dataframe[self.output_key] #preprocessing
@@ -362,12 +961,141 @@ class turbine_GPR:
             file.writelines(text_model_variables)
          with open(f"{self.models_subfolder_path}/{model_name}/{model_name}_output_variable.txt", "w") as file:
             file.writelines(self.output_key)
+            
+         save_compact_model(self.fitted_function,
+                            f"{self.models_subfolder_path}/{model_name}/compact",
+                            model_variables,
+                            self.output_key)
+            
+         model_registry.discard(model_name)
+         
+   def update(self,
+              new_rows,
+              refit=False,
+              lml_drift_threshold=None,
+              fit_options=None):
+      """Add training points, keeping the current kernel hyperparameters.
+
+      The Cholesky factor of the training covariance is extended by a block update and alpha is recalculated, costing O(n^2 k) for k new rows rather than the O(n^3) hyperparameter search of fit. The updated model belongs to this turbine_GPR only, the model shared through model_registry is left unchanged. Sparse models are always refitted.
+
+      Args:
+          new_rows (Pandas DataFrame): New training data, with a column for every variable and for the output.
+          refit (bool, optional): Refit the hyperparameters with fit on all of the training data instead. Defaults to False.
+          lml_drift_threshold (float, optional): Refit if the log marginal likelihood per training point moves further than this from its value at the last fit. None never refits automatically. Defaults to None.
+          fit_options (dict, optional): Keyword arguments for fit when refitting. Defaults to None.
+
+      Returns:
+          bool: True if the hyperparameters were refitted.
+      """
+      
+      if not isinstance(new_rows,pd.DataFrame):
+         sys.exit('new_rows must be a pandas DataFrame')
+         
+      elif not isinstance(refit,bool):
+         sys.exit('refit must be True or False')
+         
+      elif (lml_drift_threshold is not None) and (not isinstance(lml_drift_threshold,(int,float))):
+         sys.exit('lml_drift_threshold must be a number or None')
+         
+      elif (fit_options is not None) and (not isinstance(fit_options,dict)):
+         sys.exit('fit_options must be a dictionary or None')
+         
+      missing_columns = [column for column in self.variables+[self.output_key] if column not in new_rows.columns]
+      if len(missing_columns) > 0:
+         sys.exit(f'new_rows is missing columns {missing_columns}')
+      
+      new_inputs = new_rows[sorted(self.variables)]
+      if isinstance(self.output_array_train,pd.DataFrame):
+         new_outputs = new_rows[[self.output_key]]
+      else:
+         new_outputs = new_rows[self.output_key]
+         
+      input_array_train = pd.concat([self.input_array_train,new_inputs],ignore_index=True)
+      output_array_train = pd.concat([self.output_array_train,new_outputs],ignore_index=True)
+      
+      # sparse models have no Cholesky factor to extend
+      if isinstance(self.fitted_function,sparse_GPR_model):
+         refit = True
+      
+      if refit == False:
+         fitted_function = self._extended_model(new_inputs.to_numpy(dtype=float),
+                                                new_rows[self.output_key].to_numpy(dtype=float))
+         
+         # the extended covariance is only lost to round-off if the new points are near duplicates
+         if fitted_function is None:
+            refit = True
+         elif lml_drift_threshold is not None:
+            lml_per_point = fitted_function.log_marginal_likelihood_value_/len(fitted_function.X_train_)
+            refit = abs(lml_per_point - self.fitted_lml_per_point) > lml_drift_threshold
+      
+      if refit == True:
+         training_dataframe = pd.concat([input_array_train,output_array_train],axis=1)
+         fit_arguments = {'variables':self.variables,
+                          'output_key':self.output_key,
+                          'limit_dict':self.limit_dict}
+         if isinstance(self.fitted_function,sparse_GPR_model):
+            fit_arguments['inducing_points'] = len(self.fitted_function.X_inducing_)
+         if fit_options is not None:
+            fit_arguments.update(fit_options)
+         self.fit(training_dataframe,**fit_arguments)
+         return True
+      
+      self.fitted_function = fitted_function
+      self.input_array_train = input_array_train
+      self.output_array_train = output_array_train
+      self.min_train_output = np.min([self.output_array_train])
+      self.max_train_output = np.max([self.output_array_train])
+      
+      return False
+   
+   def _extended_model(self,X_new,y_new):
+      # copy of the fitted model with extra training points, or None if their covariance is not positive definite
+      model = self.fitted_function
+      kernel = model.kernel_
+      y_train_mean = float(np.ravel(getattr(model,'_y_train_mean',0.0))[0])
+      y_train_std = float(np.ravel(getattr(model,'_y_train_std',1.0))[0])
+      
+      K_cross = kernel(model.X_train_,X_new)
+      K_new = kernel(X_new)
+      K_new[np.diag_indices_from(K_new)] += getattr(model,'alpha',1e-10)
+      
+      L_cross = solve_triangular(model.L_,K_cross,lower=True,check_finite=False)
+      try:
+         L_new = np.linalg.cholesky(K_new - L_cross.T @ L_cross)
+      except np.linalg.LinAlgError:
+         return None
+      
+      n_train = len(model.X_train_)
+      L = np.zeros((n_train+len(X_new),n_train+len(X_new)))
+      L[:n_train,:n_train] = model.L_
+      L[n_train:,:n_train] = L_cross.T
+      L[n_train:,n_train:] = L_new
+      
+      y_train = np.concatenate((np.ravel(model.y_train_),(y_new - y_train_mean)/y_train_std))
+      
+      # alpha = K^-1 y from two triangular solves, with the log marginal likelihood from the first
+      L_inv_y = solve_triangular(L,y_train,lower=True,check_finite=False)
+      log_marginal_likelihood = -0.5*(L_inv_y @ L_inv_y) - np.sum(np.log(np.diag(L))) - 0.5*len(y_train)*np.log(2*np.pi)
+      
+      extended_model = copy.copy(model)
+      extended_model.X_train_ = np.vstack((model.X_train_,X_new))
+      extended_model.y_train_ = y_train
+      extended_model.L_ = L
+      extended_model.alpha_ = solve_triangular(L,L_inv_y,lower=True,trans='T',check_finite=False)
+      extended_model.log_marginal_likelihood_value_ = log_marginal_likelihood
+      if isinstance(extended_model,compact_GPR_model):
+         extended_model._cast_arrays = {}
+      
+      return extended_model
 
    def predict(self,
                dataframe,
                include_output=False,
                CI_in_dataframe=False,
-               CI_percent=95
+               CI_percent=95,
+               mean_only=False,
+               dtype=np.float64,
+               CI_bounds=False
                ):
       """_summary_
 
@@ -376,6 +1104,9 @@ class turbine_GPR:
           include_output (bool, optional): _description_. Defaults to False.
           CI_in_dataframe (bool, optional): _description_. Defaults to False.
           CI_percent (int, optional): _description_. Defaults to 95.
+          mean_only (bool, optional): Only predict the mean, skipping the standard deviation and confidence bounds, which are set to None. Defaults to False.
+          dtype (numpy dtype, optional): Precision to evaluate the kernel in, np.float64 or np.float32. Defaults to np.float64.
+          CI_bounds (bool, optional): Set the upper and lower confidence bounds as attributes even if CI_in_dataframe is False. Otherwise they are only calculated for CI_in_dataframe, and are None. Defaults to False.
 
       Returns:
           _type_: _description_
@@ -396,9 +1127,24 @@ class turbine_GPR:
       elif CI_percent<0:
          sys.exit('CI_percent must be positive')
          
-
-      dataframe = dataframe.reindex(sorted(dataframe.columns), axis=1)
-      dataframe = drop_columns(dataframe,self.variables,self.output_key)
+      elif not isinstance(mean_only,bool):
+         sys.exit('mean_only must be True or False')
+         
+      elif mean_only and CI_in_dataframe:
+         sys.exit('CI_in_dataframe cannot be used with mean_only')
+         
+      elif not isinstance(CI_bounds,bool):
+         sys.exit('CI_bounds must be True or False')
+         
+      elif mean_only and CI_bounds:
+         sys.exit('CI_bounds cannot be used with mean_only')
+         
+      missing_variables = [variable for variable in self.variables if variable not in dataframe.columns]
+      if len(missing_variables) > 0:
+         sys.exit(f'dataframe is missing variables {missing_variables}')
+      
+      if include_output and (self.output_key not in dataframe.columns):
+         sys.exit(f'dataframe is missing output {self.output_key}')
       
       # #preprocessing from here
       # if include_output == True:
@@ -420,15 +1166,18 @@ class turbine_GPR:
       # #    self.input_array_test = scaled_dataframe
       # #preprocessing to here
 
+      self.input_array_test = dataframe[sorted(self.variables)]
       if include_output == True:
-         self.input_array_test = dataframe.drop(columns=[self.output_key])
          self.output_array_test = dataframe[self.output_key]
-      else:
-         self.input_array_test = dataframe
    
-      self.CI_percent = CI_percent
-      
-      self.mean_prediction, self.std_prediction = self.fitted_function.predict(self.input_array_test.to_numpy(), return_std=True)
+      if mean_only == True:
+         mean_prediction = self.predict_array(self.input_array_test.to_numpy(),
+                                              dtype=dtype)
+         std_prediction = None
+      else:
+         mean_prediction, std_prediction = self.predict_array(self.input_array_test.to_numpy(),
+                                                              return_std=True,
+                                                              dtype=dtype)
       
       # #preprocessing from here
 
@@ -442,10 +1191,8 @@ class turbine_GPR:
       #    self.input_array_test = dataframe
       # #preprocessing to here
       
-      self.upper = st.norm.ppf((CI_percent / 100),loc=self.mean_prediction,scale=self.std_prediction)
-      self.lower = st.norm.ppf((1 - (CI_percent / 100)),loc=self.mean_prediction,scale=self.std_prediction)
-      
-      self.training_output = self.output_array_train
+      self._store_prediction(mean_prediction,std_prediction,CI_percent,
+                             bounds=(CI_in_dataframe or CI_bounds))
             
       self.predicted_dataframe = self.input_array_test
       self.predicted_dataframe['predicted_output'] = self.mean_prediction
@@ -453,31 +1200,96 @@ class turbine_GPR:
          self.RMSE = np.sqrt(mean_squared_error(self.output_array_test,self.mean_prediction))
          self.predicted_dataframe['actual_output'] = self.output_array_test
          self.predicted_dataframe['percent_error'] = abs((self.mean_prediction - self.output_array_test)/self.output_array_test)*100
-         self.score = self.fitted_function.score(dataframe.drop(columns=[self.output_key]).to_numpy(),dataframe[self.output_key].to_numpy())
+         self.score = 1 - np.sum((self.output_array_test - self.mean_prediction)**2)/np.sum((self.output_array_test - np.mean(self.output_array_test))**2)
       if CI_in_dataframe == True:
          self.predicted_dataframe['upper'] = self.upper
          self.predicted_dataframe['lower'] = self.lower
-         
+
+      return self.predicted_dataframe
+   
+   def _store_prediction(self,mean_prediction,std_prediction,CI_percent,bounds=True):
+      # prediction attributes read by the plotting methods, with confidence bounds only if requested and std_prediction is given
+      self.CI_percent = CI_percent
+      self.mean_prediction = mean_prediction
+      self.std_prediction = std_prediction
+      
+      if (std_prediction is None) or (not bounds):
+         self.upper = None
+         self.lower = None
+      else:
+         z = st.norm.ppf(CI_percent / 100)
+         self.upper = mean_prediction + z*std_prediction
+         self.lower = mean_prediction - z*std_prediction
+      
+      self.training_output = self.output_array_train
       
-      self.min_output = np.amin(self.mean_prediction)
-      self.min_output_indices = np.where(self.mean_prediction == self.min_output)
+      self.min_output = np.amin(mean_prediction)
+      self.min_output_indices = np.where(mean_prediction == self.min_output)
       
-      self.max_output = np.amax(self.mean_prediction)
-      self.max_output_indices = np.where(self.mean_prediction == self.max_output)
+      self.max_output = np.amax(mean_prediction)
+      self.max_output_indices = np.where(mean_prediction == self.max_output)
+   
+   def predict_array(self,
+                     X,
+                     return_std=False,
+                     dtype=np.float64):
+      """Predict from a plain array, without any pandas handling or stored attributes.
 
-      return self.predicted_dataframe
+      Args:
+          X (numpy array): Input points of shape (n, d), with one column per variable in sorted variable order.
+          return_std (bool, optional): Also return the standard deviation. Defaults to False.
+          dtype (numpy dtype, optional): Precision to evaluate the kernel in, np.float64 or np.float32. Defaults to np.float64.
+
+      Returns:
+          numpy array or tuple: Mean prediction of shape (n,), or (mean, std) if return_std is True.
+      """
+      
+      X = np.asarray(X,dtype=float)
+      if (X.ndim != 2) or (X.shape[1] != self.fit_dimensions):
+         sys.exit(f'X must have shape (n, {self.fit_dimensions}), with columns {sorted(self.variables)}')
+         
+      elif np.dtype(dtype) not in [np.float64,np.float32]:
+         sys.exit('dtype must be np.float64 or np.float32')
+      
+      prediction_model = self._prediction_model(dtype)
+      if isinstance(prediction_model,compact_GPR_model):
+         return prediction_model.predict(X,return_std=return_std,dtype=dtype)
+      else:
+         return prediction_model.predict(X,return_std=return_std)
+   
+   def _prediction_model(self,dtype):
+      # sklearn kernels always evaluate in float64, so other precisions use a compact copy of a fitted model
+      if isinstance(self.fitted_function,compact_GPR_model) or (np.dtype(dtype) == np.float64):
+         return self.fitted_function
+      
+      if getattr(self,'_compact_fitted_function',(None,None))[0] is not self.fitted_function:
+         try:
+            compact_function = compact_GPR_model.from_fitted(self.fitted_function,self.variables,self.output_key)
+         except ValueError as error:
+            sys.exit(f'{np.dtype(dtype)} prediction is not possible for this model: {error}')
+         self._compact_fitted_function = (self.fitted_function,compact_function)
+         
+      return self._compact_fitted_function[1]
       
    def find_max_min(self,
                     num_points_interpolate=20,
-                    limit_dict=None):
-      """_summary_
+                    limit_dict=None,
+                    chunk_size=100000,
+                    n_jobs=1,
+                    refine=False):
+      """Maximum and minimum predicted output over a regular grid spanning limit_dict.
+
+      The grid is evaluated in chunks of flat grid indices, keeping only the running maximum and minimum, so its full size is never held in memory.
 
       Args:
-          num_points_interpolate (int, optional): _description_. Defaults to 20.
-          limit_dict (_type_, optional): _description_. Defaults to None.
+          num_points_interpolate (int, optional): Number of grid points along each variable. Defaults to 20.
+          limit_dict (dict, optional): (min, max) of each variable. Defaults to None, which uses self.limit_dict.
+          chunk_size (int, optional): Number of grid points predicted at once. Defaults to 100000.
+          n_jobs (int, optional): Number of threads to evaluate chunks over. None or -1 uses one per CPU. Defaults to 1.
+          refine (bool, optional): Refine the best grid points with a bounded L-BFGS-B search. Defaults to False.
 
       Returns:
-          _type_: _description_
+          tuple: (max_output_row, min_output_row), one-row DataFrames of the variables and predicted_output.
       """
       
       if not isinstance(num_points_interpolate,int):
@@ -489,27 +1301,76 @@ class turbine_GPR:
       elif (limit_dict!=None) and (not isinstance(limit_dict,dict)):
          sys.exit("limit_dict must be None or a dictionary")
          
+      elif (not isinstance(chunk_size,int)) or (chunk_size<1):
+         sys.exit('chunk_size must be a positive integer')
+         
+      elif (n_jobs is not None) and (not isinstance(n_jobs,int)):
+         sys.exit('n_jobs must be an integer or None')
+         
+      elif not isinstance(refine,bool):
+         sys.exit('refine must be True or False')
+         
       if limit_dict != None:
          self.limit_dict = limit_dict
+         
+      variables = sorted(self.variables)
+      missing_variables = [variable for variable in variables if variable not in self.limit_dict]
+      if len(missing_variables) > 0:
+         sys.exit(f'limit_dict is missing variables {missing_variables}')
       
-      vars_dict = OrderedDict()
-      for key in self.limit_dict:
-         vars_dict[key] = np.linspace(start=self.limit_dict[key][0], stop=self.limit_dict[key][1], num=num_points_interpolate)
-
-      vars_grid_array = np.meshgrid(*vars_dict.values())
-      min_max_dataframe = pd.DataFrame({})
-
-      for index,key in enumerate(vars_dict.keys()):
-         vars_dict[key] = vars_grid_array[index]
-         var_vector = vars_dict[key].ravel()
-         min_max_dataframe[key] = var_vector
-
-      min_max_dataframe = self.predict(min_max_dataframe)
+      axes = [np.linspace(start=self.limit_dict[variable][0], stop=self.limit_dict[variable][1], num=num_points_interpolate) for variable in variables]
+      grid_size = num_points_interpolate**len(axes)
       
-      self.min_output_row = min_max_dataframe.iloc[self.min_output_indices]
-      self.max_output_row = min_max_dataframe.iloc[self.max_output_indices]
+      # joblib only treats None as all CPUs inside a parallel_config context
+      chunk_extrema = joblib.Parallel(n_jobs=-1 if n_jobs is None else n_jobs,prefer='threads')(
+         joblib.delayed(self._grid_extrema)(axes,start,min(start+chunk_size,grid_size)) for start in range(0,grid_size,chunk_size)
+         )
+      
+      # first occurrence of each extremum, as np.argmin and np.argmax would give
+      min_output, min_index, min_point, _, _, _ = min(chunk_extrema,key=lambda extrema: extrema[0])
+      _, _, _, max_output, max_index, max_point = max(chunk_extrema,key=lambda extrema: extrema[3])
+      
+      if refine == True:
+         bounds = [tuple(self.limit_dict[variable]) for variable in variables]
+         min_point, min_output = self._refine_extremum(min_point,min_output,bounds,sign=1.0)
+         max_point, max_output = self._refine_extremum(max_point,max_output,bounds,sign=-1.0)
+      
+      self.min_output = min_output
+      self.max_output = max_output
+      
+      self.min_output_row = pd.DataFrame(np.append(min_point,min_output)[np.newaxis,:],
+                                         columns=variables+['predicted_output'],
+                                         index=[min_index])
+      self.max_output_row = pd.DataFrame(np.append(max_point,max_output)[np.newaxis,:],
+                                         columns=variables+['predicted_output'],
+                                         index=[max_index])
          
       return self.max_output_row,self.min_output_row
+   
+   def _grid_extrema(self,axes,start,stop):
+      # extrema of the predicted output over flat indices [start, stop) of the grid spanned by axes
+      grid_indices = np.unravel_index(np.arange(start,stop),[len(axis) for axis in axes])
+      X = np.column_stack([axis[grid_index] for axis,grid_index in zip(axes,grid_indices)])
+      
+      mean_prediction = self.predict_array(X)
+      
+      i_min = np.argmin(mean_prediction)
+      i_max = np.argmax(mean_prediction)
+      
+      return (mean_prediction[i_min], start+i_min, X[i_min],
+              mean_prediction[i_max], start+i_max, X[i_max])
+   
+   def _refine_extremum(self,point,output,bounds,sign):
+      # bounded local search from a grid point, minimising sign*prediction
+      result = minimize(lambda x: sign*self.predict_array(x[np.newaxis,:])[0],
+                        x0=point,
+                        method='L-BFGS-B',
+                        bounds=bounds)
+      
+      if result.fun < sign*output:
+         return result.x, sign*result.fun
+      else:
+         return point, output
         
    def plot_vars(self,
                  x1=None,
@@ -533,7 +1394,8 @@ class turbine_GPR:
                  plot_actual_data_filter_factor=5,
                  show_actual_with_model=True,
                  fix_eta_lost_colors=False,
-                 show_title=True
+                 show_title=True,
+                 prediction=None
                  ):
       """_summary_
 
@@ -558,6 +1420,7 @@ class turbine_GPR:
           plot_actual_data (bool, optional): _description_. Defaults to False.
           plot_actual_data_filter_factor (int, optional): _description_. Defaults to 5.
           show_actual_with_model (bool, optional): _description_. Defaults to True.
+          prediction (tuple, optional): (mean, std) already predicted for the panel's inputs, as plot does for all its panels in one batch. Defaults to None, which predicts here.
 
       Returns:
           _type_: _description_
@@ -588,71 +1451,25 @@ class turbine_GPR:
       cmap_tuples = list(zip(map(cmap_norm,color_limits), cmap_colors))
       output_cmap = mcol.LinearSegmentedColormap.from_list("", cmap_tuples)
       
-      plot_dataframe = pd.DataFrame({})
-      
       if limit_dict == None:
          limit_dict = self.limit_dict
       
-      plot_title = ' '
-
-      constants_check=self.variables.copy()
-                    
-      if (x1 != None) and (x2 == None):
-         plot_key1 = x1
-         plot_dataframe[plot_key1] = np.linspace(start=limit_dict[plot_key1][0], stop=limit_dict[plot_key1][1], num=num_points)
-         constants_check.remove(plot_key1)  
-         dimensions=1   
-      elif (x1 == None) and (x2 != None):
-         plot_key1 = x2
-         plot_dataframe[plot_key1] = np.linspace(start=limit_dict[plot_key1][0], stop=limit_dict[plot_key1][1], num=num_points)
-         constants_check.remove(plot_key1)
-         dimensions=1
-      elif (x1 != None) and (x2 != None):
-         plot_key1 = x1
-         plot_dataframe[plot_key1] = np.linspace(start=limit_dict[plot_key1][0], stop=limit_dict[plot_key1][1], num=num_points)
-         constants_check.remove(plot_key1)
-         plot_key2 = x2
-         plot_dataframe[plot_key2] = np.linspace(start=limit_dict[plot_key2][0], stop=limit_dict[plot_key2][1], num=num_points)
-         constants_check.remove(plot_key2)
-         dimensions=2
-      else:
-         sys.exit("Please specify x or y") 
-      
-      constant_value = {}
+      plot_dataframe, plot_keys, X1, X2, constants_check, constant_value = self._plot_vars_dataframe(x1,x2,constants,limit_dict,num_points)
+      dimensions = len(plot_keys)
+      plot_key1 = plot_keys[0]
+      plot_key2 = plot_keys[-1]
       
-      if constants == 'mean':
-         for constant_key in constants_check:
-            constant_value[constant_key] = np.mean(self.input_array_train[constant_key])
-         
-      elif set(constants_check) != set(constants):
-         sys.exit("Constants specified are incorrect")
-         
-      else:
-         for constant_key in constants:
-            if (constants[constant_key] == 'mean'):
-               constant_value[constant_key] = np.mean(self.input_array_train[constant_key])
-            else:
-               constant_value[constant_key] = constants[constant_key]
-               
+      plot_title = ' '
       for constant_key in constants_check:
          plot_title += f'{to_latex(constant_key)} = {constant_value[constant_key]:.3f}'
          plot_title += ' '*title_variable_spacing
-      
-      if dimensions == 2:
 
-         X1,X2 = np.meshgrid(plot_dataframe[plot_key1],
-                             plot_dataframe[plot_key2]) 
-         X1_vector = X1.ravel() 
-         X2_vector = X2.ravel() 
-         plot_dataframe = pd.DataFrame({})
-         plot_dataframe[plot_key1] = X1_vector
-         plot_dataframe[plot_key2] = X2_vector
-      
-      for constant_key in constants_check:
-         plot_dataframe[constant_key] = constant_value[constant_key]*np.ones(num_points**dimensions)
-
-      self.predict(plot_dataframe,
-                   CI_percent=CI_percent)
+      if prediction is None:
+         self.predict(plot_dataframe,
+                      CI_percent=CI_percent,
+                      CI_bounds=True)
+      else:
+         self._store_prediction(prediction[0],prediction[1],CI_percent)
             
       if plot_actual_data == True:
          lower_factor = 1 - plot_actual_data_filter_factor/100
@@ -900,6 +1717,59 @@ class turbine_GPR:
          
       return plot_dataframe
       
+   def _plot_vars_dataframe(self,x1,x2,constants,limit_dict,num_points):
+      # inputs of one plot_vars panel, returned as (plot_dataframe, plot_keys, X1, X2, constants_check, constant_value)
+      plot_dataframe = pd.DataFrame({})
+      
+      if limit_dict == None:
+         limit_dict = self.limit_dict
+
+      constants_check=self.variables.copy()
+                    
+      if (x1 != None) and (x2 == None):
+         plot_keys = [x1]
+      elif (x1 == None) and (x2 != None):
+         plot_keys = [x2]
+      elif (x1 != None) and (x2 != None):
+         plot_keys = [x1,x2]
+      else:
+         sys.exit("Please specify x or y") 
+         
+      for plot_key in plot_keys:
+         plot_dataframe[plot_key] = np.linspace(start=limit_dict[plot_key][0], stop=limit_dict[plot_key][1], num=num_points)
+         constants_check.remove(plot_key)
+      dimensions = len(plot_keys)
+      
+      constant_value = {}
+      
+      if constants == 'mean':
+         for constant_key in constants_check:
+            constant_value[constant_key] = np.mean(self.input_array_train[constant_key])
+         
+      elif set(constants_check) != set(constants):
+         sys.exit("Constants specified are incorrect")
+         
+      else:
+         for constant_key in constants:
+            if (constants[constant_key] == 'mean'):
+               constant_value[constant_key] = np.mean(self.input_array_train[constant_key])
+            else:
+               constant_value[constant_key] = constants[constant_key]
+      
+      X1, X2 = None, None
+      if dimensions == 2:
+
+         X1,X2 = np.meshgrid(plot_dataframe[plot_keys[0]],
+                             plot_dataframe[plot_keys[1]]) 
+         plot_dataframe = pd.DataFrame({})
+         plot_dataframe[plot_keys[0]] = X1.ravel()
+         plot_dataframe[plot_keys[1]] = X2.ravel()
+      
+      for constant_key in constants_check:
+         plot_dataframe[constant_key] = constant_value[constant_key]*np.ones(num_points**dimensions)
+         
+      return plot_dataframe, plot_keys, X1, X2, constants_check, constant_value
+      
    def plot_accuracy(self,
                      testing_dataframe,
                      axis=None,
@@ -1099,11 +1969,8 @@ class turbine_GPR:
                                sharex=True,
                                sharey=True
                                )
-      grid_counter=0
-      print(f'plot [{grid_counter}/{num_rows*num_columns}]')
+      panels = []
       for indices, axis in np.ndenumerate(axes):
-         grid_counter+=1
-         
          
          if (num_columns == 1) and (num_rows > 1):
             i = np.squeeze(indices)
@@ -1129,6 +1996,28 @@ class turbine_GPR:
                   constant_dict[var] = 'mean'
                else:
                   constant_dict[var] = constants[var]
+                  
+         panels.append((i,j,axis,constant_dict))
+         
+      # every panel's grid is predicted in one batch, then split between the panels
+      if optimum_plot == True:
+         panel_inputs = [self._plot_optimum_inputs(x1,x2,constant_dict,num_points)[0] for i,j,axis,constant_dict in panels]
+      else:
+         panel_inputs = [self._plot_vars_dataframe(x1,x2,constant_dict,limit_dict,num_points)[0][sorted(self.variables)].to_numpy() for i,j,axis,constant_dict in panels]
+      split_indices = np.cumsum([len(panel_input) for panel_input in panel_inputs])[:-1]
+      
+      if optimum_plot == True:
+         panel_means = np.split(self.predict_array(np.vstack(panel_inputs)),split_indices)
+      else:
+         mean_prediction, std_prediction = self.predict_array(np.vstack(panel_inputs),return_std=True)
+         panel_means = np.split(mean_prediction,split_indices)
+         panel_stds = np.split(std_prediction,split_indices)
+      
+      grid_counter=0
+      print(f'plot [{grid_counter}/{num_rows*num_columns}]')
+      for panel_index,(i,j,axis,constant_dict) in enumerate(panels):
+         grid_counter+=1
+         
          if optimum_plot == True:
             self.plot_optimum(opt_var=x1,
                               vary_var=x2,
@@ -1140,7 +2029,8 @@ class turbine_GPR:
                               axis=axis,
                               plotting_grid_value=[i,j],
                               legend_outside=legend_outside,
-                              grid_height=num_rows)
+                              grid_height=num_rows,
+                              mean_prediction=panel_means[panel_index])
          else:
             
             self.plot_vars(x1=x1,
@@ -1163,7 +2053,8 @@ class turbine_GPR:
                            plot_actual_data=plot_actual_data,
                            plot_actual_data_filter_factor=plot_actual_data_filter_factor,
                            show_actual_with_model=show_actual_with_model,
-                           fix_eta_lost_colors=fix_eta_lost_colors
+                           fix_eta_lost_colors=fix_eta_lost_colors,
+                           prediction=(panel_means[panel_index],panel_stds[panel_index])
                            )
             if grid_counter==1:
                if CI_percent==0:
@@ -1251,7 +2142,8 @@ class turbine_GPR:
                     plotting_grid_value=[0,0],
                     legend_outside = False,
                     grid_height=1,
-                    show_title=True):
+                    show_title=True,
+                    mean_prediction=None):
       """_summary_
 
       Args:
@@ -1265,6 +2157,7 @@ class turbine_GPR:
           axis (_type_, optional): _description_. Defaults to None.
           plotting_grid_value (list, optional): _description_. Defaults to [0,0].
           legend_outside (bool, optional): _description_. Defaults to False.
+          mean_prediction (numpy array, optional): Mean already predicted over the panel's grid, as plot does for all its panels in one batch. Defaults to None, which predicts here.
       """
       
       if axis == None:
@@ -1273,107 +2166,22 @@ class turbine_GPR:
       else:
          plot_now = False
          
-      if limit_dict == None:
-         limit_dict = self.limit_dict
-
-      constants_check=self.variables.copy()
-      constants_check.remove(vary_var) 
-      constants_check.remove(opt_var) 
-      
-      plot_title = ''
-      
-      ## filter by factor% error
-      # lower_factor = 1 - plot_actual_data_filter_factor/100
-      # upper_factor = 1 + plot_actual_data_filter_factor/100
-      
-      input_data_copy = self.input_array_train.copy()
-      output_data_copy = self.output_array_train.copy()
-      actual_data_df_datum = pd.concat([input_data_copy,output_data_copy],axis=1)
-      
-      # vary_range = np.max(actual_data_df_datum[vary_var]) - np.min(actual_data_df_datum[vary_var])
-      # opt_range = np.max(actual_data_df_datum[opt_var]) - np.min(actual_data_df_datum[opt_var])
-      
-      # vary_mean = np.mean(actual_data_df_datum[vary_var])
-      # opt_mean = np.mean(actual_data_df_datum[opt_var])
-      
-      extrapolation_border_vary = 0
-      extrapolation_border_opt = 0
-      
-      # vary_min = vary_mean - 0.5*(vary_range*extrapolation_border)
-      # vary_max = vary_mean + 0.5*(vary_range*extrapolation_border)
-      # opt_min = opt_mean - 0.5*(opt_range*extrapolation_border)
-      # opt_max = opt_mean + 0.5*(opt_range*extrapolation_border)
-      
-      vary_min = np.percentile(actual_data_df_datum[vary_var],extrapolation_border_vary)
-      vary_max = np.percentile(actual_data_df_datum[vary_var],100-extrapolation_border_vary)
-      opt_min = np.percentile(actual_data_df_datum[opt_var],extrapolation_border_opt)
-      opt_max = np.percentile(actual_data_df_datum[opt_var],100-extrapolation_border_opt)
-      
-      vary_var_values = np.linspace(vary_min,vary_max,num_points)
-      # opt_values = np.zeros(num_points)
-      opt_values_GPR = np.zeros(num_points)
-      plot_dataframe = pd.DataFrame({})
-      # plot_dataframe[opt_var] = np.linspace(np.min(actual_data_df_datum[opt_var]),np.max(actual_data_df_datum[opt_var]),num_points)
-      plot_dataframe[opt_var] = np.linspace(opt_min,opt_max,num_points)
-      
-      constant_value = {}
-      
-      if constants == 'mean':
-         for constant_key in constants_check:
-            constant_value[constant_key] = np.mean(self.input_array_train[constant_key])
-         
-      elif set(constants_check) != set(constants):
-         sys.exit("Constants specified are incorrect")
+      if limit_dict == None:
+         limit_dict = self.limit_dict
          
-      else:
-         for constant_key in constants:
-            if (constants[constant_key] == 'mean'):
-               constant_value[constant_key] = np.mean(self.input_array_train[constant_key])
-            else:
-               constant_value[constant_key] = constants[constant_key]
-               
+      X, vary_var_values, opt_var_values, constants_check, constant_value = self._plot_optimum_inputs(opt_var,vary_var,constants,num_points)
+      vary_min, vary_max = vary_var_values[0], vary_var_values[-1]
+      
+      plot_title = ''
       for constant_key in constants_check:
-         plot_dataframe[constant_key] = constant_value[constant_key]*np.ones(num_points)
-         # val = constant_value[constant_key]
-
-         # actual_data_df_datum = actual_data_df_datum[actual_data_df_datum[constant_key] < upper_factor*val]
-         # actual_data_df_datum = actual_data_df_datum[actual_data_df_datum[constant_key] > lower_factor*val]
-         
          plot_title += f'{to_latex(constant_key)} = {constant_value[constant_key]:.3f}'
          plot_title += ' '*title_variable_spacing
-            
-      for i,vary_var_val in enumerate(vary_var_values):
-         
-         # actual_data_df = actual_data_df_datum.copy()
-
-         # vary var
-         plot_dataframe[vary_var] = vary_var_val*np.ones(num_points)
-
-         # actual_data_df = actual_data_df[actual_data_df[vary_var] < upper_factor*vary_var_val]
-         # actual_data_df = actual_data_df[actual_data_df[vary_var] > lower_factor*vary_var_val]
-         
-         # if actual_data_df.shape[0] >= 5:
-
-         #    poly_degree = 3
-               
-         #    coefs = np.polynomial.polynomial.polyfit(x=actual_data_df[opt_var],
-         #                                              y=actual_data_df[self.output_key],
-         #                                              deg=poly_degree)
-
-         #    fit_function = np.polynomial.polynomial.Polynomial(coefs)    # instead of np.poly1d
-
-         #    x_actual_fit = np.linspace(np.min(actual_data_df[opt_var]),np.max(actual_data_df[opt_var]),num_points)
-         #    y_actual_fit = fit_function(x_actual_fit)
-            
-            
-         #    y_min = np.amin(y_actual_fit)
-         #    opt_val = x_actual_fit[np.where(y_actual_fit == y_min)][0]
-         #    opt_values[i] = opt_val
-            
-         self.predict(plot_dataframe)
-         min_i = np.squeeze(self.min_output_indices)
-         opt_val_GPR = plot_dataframe[opt_var][min_i]
-         opt_values_GPR[i] = opt_val_GPR
+      
+      if mean_prediction is None:
+         mean_prediction = self.predict_array(X)
+      
+      # rows of the grid are values of vary_var, columns are values of opt_var
+      opt_values_GPR = opt_var_values[np.argmin(mean_prediction.reshape(num_points,num_points),axis=1)]
          
       # axis.scatter(vary_var_values[opt_values !=0],
       #              opt_values[opt_values !=0],
@@ -1426,11 +2234,389 @@ class turbine_GPR:
          fig.tight_layout()
          plt.show()
 
+   def _plot_optimum_inputs(self,opt_var,vary_var,constants,num_points):
+      # inputs of one plot_optimum panel, returned as (X, vary_var_values, opt_var_values, constants_check, constant_value)
+      # X covers every pair of vary_var and opt_var values, with vary_var varying slowest
+      constants_check=self.variables.copy()
+      constants_check.remove(vary_var) 
+      constants_check.remove(opt_var) 
+      
+      extrapolation_border_vary = 0
+      extrapolation_border_opt = 0
+      
+      vary_min = np.percentile(self.input_array_train[vary_var],extrapolation_border_vary)
+      vary_max = np.percentile(self.input_array_train[vary_var],100-extrapolation_border_vary)
+      opt_min = np.percentile(self.input_array_train[opt_var],extrapolation_border_opt)
+      opt_max = np.percentile(self.input_array_train[opt_var],100-extrapolation_border_opt)
+      
+      vary_var_values = np.linspace(vary_min,vary_max,num_points)
+      opt_var_values = np.linspace(opt_min,opt_max,num_points)
+      
+      constant_value = {}
+      
+      if constants == 'mean':
+         for constant_key in constants_check:
+            constant_value[constant_key] = np.mean(self.input_array_train[constant_key])
+         
+      elif set(constants_check) != set(constants):
+         sys.exit("Constants specified are incorrect")
+         
+      else:
+         for constant_key in constants:
+            if (constants[constant_key] == 'mean'):
+               constant_value[constant_key] = np.mean(self.input_array_train[constant_key])
+            else:
+               constant_value[constant_key] = constants[constant_key]
+      
+      vary_grid, opt_grid = np.meshgrid(vary_var_values,opt_var_values,indexing='ij')
+      grid_columns = {vary_var:vary_grid.ravel(),
+                      opt_var:opt_grid.ravel()}
+      for constant_key in constants_check:
+         grid_columns[constant_key] = np.full(num_points**2,constant_value[constant_key],dtype=float)
+      
+      X = np.column_stack([grid_columns[variable] for variable in sorted(self.variables)])
+      
+      return X, vary_var_values, opt_var_values, constants_check, constant_value
+
+class turbine_GPR_group:
+   """Mean predictions of several fitted models evaluated together.
+
+   The input matrix is validated and ordered once for the whole group. Models
+   trained on the same inputs with the same optimised kernel share a single
+   cross-kernel evaluation, and their weights are stacked into one matrix
+   product. Predictions are returned as one structured array with a field
+   per model output.
+   """
+   
+   def __init__(self,model_names):
+      """_summary_
+
+      Args:
+          model_names (list[str]): Names of the models in the group. Each must have a different output variable.
+      """
+      
+      if isinstance(model_names,str):
+         model_names = [model_names]
+      self.model_names = list(model_names)
+      
+      model_entries = []
+      for model_name in self.model_names:
+         try:
+            model_entries.append(model_registry.get(model_name))
+         except FileNotFoundError:
+            sys.exit(f'No model fitted named {model_name}')
+            
+      self.output_keys = [model_entry['output_key'] for model_entry in model_entries]
+      if len(set(self.output_keys)) != len(self.output_keys):
+         sys.exit('models in a group must have different output variables')
+      
+      self.variables = sorted(set([variable for model_entry in model_entries for variable in model_entry['variables']]))
+      self.output_dtype = np.dtype([(output_key,np.float64) for output_key in self.output_keys])
+      
+      kernel_groups = OrderedDict()
+      for output_key,model_entry in zip(self.output_keys,model_entries):
+         model_variables = sorted(model_entry['variables'])
+         group_key = (tuple(model_variables),model_entry['X_train_hash'],model_entry['kernel_key'])
+         model = model_entry['fitted_function']
+         
+         if group_key not in kernel_groups:
+            if isinstance(model,compact_GPR_model):
+               cross_kernel = model.cross_kernel
+            else:
+               cross_kernel = functools.partial(model.kernel_,Y=model.X_train_)
+            kernel_groups[group_key] = {'columns':[self.variables.index(variable) for variable in model_variables],
+                                        'cross_kernel':cross_kernel,
+                                        'output_keys':[],
+                                        'alpha':[],
+                                        'y_train_mean':[],
+                                        'y_train_std':[]}
+         kernel_group = kernel_groups[group_key]
+         kernel_group['output_keys'].append(output_key)
+         kernel_group['alpha'].append(np.ravel(model.alpha_))
+         kernel_group['y_train_mean'].append(float(np.ravel(getattr(model,'_y_train_mean',0.0))[0]))
+         kernel_group['y_train_std'].append(float(np.ravel(getattr(model,'_y_train_std',1.0))[0]))
+      
+      for kernel_group in kernel_groups.values():
+         kernel_group['alpha'] = np.column_stack(kernel_group['alpha'])
+         kernel_group['y_train_mean'] = np.array(kernel_group['y_train_mean'])
+         kernel_group['y_train_std'] = np.array(kernel_group['y_train_std'])
+         
+      self.kernel_groups = list(kernel_groups.values())
+      
+   def input_matrix(self,inputs):
+      """Validate inputs and order them into the input matrix shared by the group.
+
+      Args:
+          inputs (Pandas DataFrame or dict): Values of every variable in the group. Other columns are ignored.
+
+      Returns:
+          numpy array: Input matrix with one column per variable, in sorted variable order.
+      """
+      
+      missing_variables = [variable for variable in self.variables if variable not in inputs]
+      if len(missing_variables) > 0:
+         sys.exit(f'inputs are missing variables {missing_variables}')
+      
+      try:
+         input_matrix = np.column_stack([np.asarray(inputs[variable],dtype=float).ravel() for variable in self.variables])
+      except ValueError:
+         sys.exit('inputs must be numeric and all of the same length')
+         
+      if not np.all(np.isfinite(input_matrix)):
+         sys.exit('inputs must be finite')
+         
+      return input_matrix
+   
+   def predict(self,inputs):
+      """Mean prediction of every model in the group.
+
+      Args:
+          inputs (Pandas DataFrame or dict): Values of every variable in the group. Other columns are ignored.
+
+      Returns:
+          numpy structured array: Predicted output of each model, in a field named after its output variable.
+      """
+      
+      input_matrix = self.input_matrix(inputs)
+      
+      predictions = np.empty(input_matrix.shape[0],dtype=self.output_dtype)
+      for kernel_group in self.kernel_groups:
+         K_trans = kernel_group['cross_kernel'](input_matrix[:,kernel_group['columns']])
+         mean_predictions = K_trans @ kernel_group['alpha']
+         mean_predictions = mean_predictions*kernel_group['y_train_std'] + kernel_group['y_train_mean']
+         for index,output_key in enumerate(kernel_group['output_keys']):
+            predictions[output_key] = mean_predictions[:,index]
+            
+      return predictions
+
+_datum_parameters = None
+
+def datum_parameters():
+   """Datum stage parameters from turbine_json/datum.json, read from disk once per process.
+
+   Returns:
+       dict: Copy of the datum parameters, safe to modify.
+   """
+   global _datum_parameters
+   if _datum_parameters is None:
+      package_path = pkg_resources.resource_filename('turbine_design','')
+      with open('/'.join((package_path, 'turbine_json', 'datum.json'))) as f:
+         _datum_parameters = json.load(f)
+   return copy.deepcopy(_datum_parameters)
+
+def nondim_mean_line(Al,zeta,eta_lost,loss_rat,phi,psi,M2,ga):
+   """Non-dimensional mean-line aerodynamics of a turbine stage.
+
+   Args:
+       Al (numpy array): Absolute flow angles at stations 1, 2 and 3, in degrees.
+       zeta (numpy array): Axial velocity ratios of stator and rotor.
+       eta_lost (numpy array): Lost efficiency.
+       loss_rat (numpy array): Fraction of entropy rise generated in the stator.
+       phi (numpy array): Flow coefficient.
+       psi (numpy array): Stage loading coefficient.
+       M2 (numpy array): Stator exit Mach number.
+       ga (float): Ratio of specific heats.
+
+   Returns:
+       dict: Non-dimensional flow quantities, keyed by turbine attribute name.
+   """
+   
+   cosAl = np.cos(np.radians(Al))
+   
+   # Get non-dimensional velocities from definition of flow coefficient
+   Vx_U1,Vx_U2,Vx_U3 = phi*zeta[0], phi, phi*zeta[1]
+   Vx_U = np.array([Vx_U1,Vx_U2,Vx_U3])
+   Vt_U = Vx_U * np.tan(np.radians(Al))
+   V_U = np.sqrt(Vx_U ** 2.0 + Vt_U ** 2.0)
+
+   # Change reference frame for rotor-relative velocities and angles
+   Vtrel_U = Vt_U - 1.0
+   Vrel_U = np.sqrt(Vx_U ** 2.0 + Vtrel_U ** 2.0)
+   Alrel = np.degrees(np.arctan2(Vtrel_U, Vx_U))
+
+   # Use Mach number to get U/cpTo1
+   V_sqrtcpTo2 = compflow.V_cpTo_from_Ma(M2, ga)
+   U_sqrtcpTo1 = V_sqrtcpTo2 / V_U[1]
+   
+   Usq_cpTo1 = U_sqrtcpTo1 ** 2.0
+
+   # Non-dimensional temperatures from U/cpTo Ma and stage loading definition
+   cpTo1_Usq = 1.0 / Usq_cpTo1
+   cpTo2_Usq = cpTo1_Usq
+   cpTo3_Usq = (cpTo2_Usq - psi)
+
+   # Turbine
+   cpTo_Usq = np.array([cpTo1_Usq, cpTo2_Usq, cpTo3_Usq])
+   
+   # Mach numbers and capacity from compressible flow relations
+   Ma = compflow.Ma_from_V_cpTo(V_U / np.sqrt(cpTo_Usq), ga)
+   Marel = Ma * Vrel_U / V_U
+   Q = compflow.mcpTo_APo_from_Ma(Ma, ga)
+   Q_Q1 = Q / Q[0]
+
+   # Use polytropic effy to get entropy change
+   To_To1 = cpTo_Usq / cpTo_Usq[0]
+   Ds_cp = -(1.0 - 1.0 / (1.0 - eta_lost)) * np.log(To_To1[-1])
+
+   # Somewhat arbitrarily, split loss using loss ratio (default 0.5)
+   s_cp = np.vstack((np.zeros_like(phi), loss_rat, np.ones_like(phi))) * Ds_cp
+
+   # Convert to stagnation pressures
+   Po_Po1 = np.exp((ga / (ga - 1.0)) * (np.log(To_To1) + s_cp))
+
+   # Account for cooling or bleed flows
+   mdot_mdot1 = 1.0
+
+   # Use definition of capacity to get flow area ratios
+   # Area ratios = span ratios because rm = const
+   Dr_Drin = mdot_mdot1 * np.sqrt(To_To1) / Po_Po1 / Q_Q1 * cosAl[0] / cosAl
+
+   # Evaluate some other useful secondary aerodynamic parameters
+   T_To1 = To_To1 / compflow.To_T_from_Ma(Ma, ga)
+   P_Po1 = Po_Po1 / compflow.Po_P_from_Ma(Ma, ga)
+   Porel_Po1 = P_Po1 * compflow.Po_P_from_Ma(Marel, ga)
+   
+   # Turbine
+   Lam = (T_To1[2] - T_To1[1]) / (T_To1[2] - T_To1[0])
+   
+   return {'Alrel':Alrel,
+           'Ma':Ma,
+           'Marel':Marel,
+           'Ax_Ax1':Dr_Drin,
+           'U_sqrtcpTo1':U_sqrtcpTo1,
+           'Po_Po1':Po_Po1,
+           'To_To1':To_To1,
+           'Vt_U':Vt_U,
+           'Vtrel_U':Vtrel_U,
+           'V_U':V_U,
+           'Vrel_U':Vrel_U,
+           'P_Po1':P_Po1,
+           'Porel_Po1':Porel_Po1,
+           'T_To1':T_To1,
+           'mdot_mdot1':mdot_mdot1,
+           'Lam':Lam}
+
+def choose_directory():
+   """Choose a directory with a dialog box. tkinter is only imported when this is called, so headless use does not need a display.
+
+   Returns:
+       str: Chosen directory.
+   """
+   from tkinter import filedialog
+   import tkinter as tk
+   
+   print('Choose file directory')
+   root = tk.Tk()
+   directory = filedialog.askdirectory(parent=root,
+                                       title="Browse File")
+   root.destroy()
+   return directory
+
+_stl_dtype = np.dtype([('normals', '<f4', (3,)),
+                       ('vectors', '<f4', (3,3)),
+                       ('attr', '<u2')])
+
+def blade_surface(sections_ps,sections_ss):
+   """Triangulated surface of one blade row, with end caps on the first and last sections.
+
+   Args:
+       sections_ps (list[np.ndarray]): Pressure side (x, r, t) coordinates of each radial section, all the same length.
+       sections_ss (list[np.ndarray]): Suction side (x, r, t) coordinates of each radial section, all the same length.
+
+   Returns:
+       tuple[np.ndarray]: (vertices, faces). vertices has shape (N,3) with columns (x, rt, r), faces has shape (M,3) and indexes vertices.
+   """
+   
+   ps = np.asarray(sections_ps,dtype=float)
+   ss = np.asarray(sections_ss,dtype=float)
+   
+   # Each section runs round the pressure side then back along the suction side
+   sect = np.concatenate((ps, ss[:,::-1]), axis=1)
+   nsect, n = sect.shape[:2]
+   x, r, t = np.moveaxis(sect,-1,0)
+   vertices = np.stack((x,r*t,r),axis=-1).reshape(-1,3)
+   
+   k = np.arange(n-1)
+   cap = np.column_stack((k+1, n-1-k, k))
+   
+   # Two triangles between each pair of points on neighbouring sections
+   i = n*np.arange(1,nsect)[:,None] + k
+   strip_a = np.stack((i, i+1-n, i+1), axis=-1)
+   strip_b = np.stack((i, i-n, i+1-n), axis=-1)
+   strips = np.concatenate((strip_a, strip_b), axis=1).reshape(-1,3)
+   
+   if nsect > 1:
+      faces = np.vstack((cap, strips, cap + n*(nsect-1)))
+   else:
+      faces = cap
+   
+   return vertices, faces
+
+def stl_bytes(vertices,faces,header=b'turbine_design'):
+   """Binary STL file contents for a triangulated surface.
+
+   Args:
+       vertices (np.ndarray): Vertex coordinates, shape (N,3).
+       faces (np.ndarray): Vertex indices of each triangle, shape (M,3).
+       header (bytes, optional): File header, truncated to 80 bytes. Defaults to b'turbine_design'.
+
+   Returns:
+       bytes: Binary STL.
+   """
+   
+   vectors = vertices[faces]
+   normals = np.cross(vectors[:,1]-vectors[:,0], vectors[:,2]-vectors[:,0])
+   norm = np.linalg.norm(normals,axis=1,keepdims=True)
+   normals = np.divide(normals,norm,out=np.zeros_like(normals),where=norm>0)
+   
+   data = np.zeros(len(faces),dtype=_stl_dtype)
+   data['normals'] = normals
+   data['vectors'] = vectors
+   
+   return header[:80].ljust(80,b'\0') + np.uint32(len(faces)).astype('<u4').tobytes() + data.tobytes()
+
 class turbine:
    """_summary_
+   
+   Derived quantities are evaluated through a dependency graph. Surrogate
+   nodes are predicted by the fitted model named in surrogate_models, and
+   depend on that model's input variables. Derived nodes are computed from
+   other nodes by the functions in derived_quantities. Any other dependency
+   name is read from the turbine attribute of the same name. Each node is
+   memoised, and only re-evaluated once one of its inputs has changed.
    """
    
-   def __init__(self,phi,psi,M2,Co):
+   surrogate_models = {'Al2a':'Al2a_model_phi_psi_M2_Co',
+                       'Al3':'Al3_model_phi_psi_M2_Co',
+                       'stagger_stator':'stagger_stator_model_phi_psi_M2_Co',
+                       'stagger_rotor':'stagger_rotor_model_phi_psi_M2_Co',
+                       's_cx_stator':'s_cx_stator_model_phi_psi_M2_Co',
+                       's_cx_rotor':'s_cx_rotor_model_phi_psi_M2_Co',
+                       'zeta_stator':'zeta_stator_model_phi_psi_M2_Co', #maybe improve this model
+                       'eta_lost':'eta_lost_model_phi_psi_M2_Co',
+                       'beta_rotor':'beta_rotor_model_phi_psi_M2_Co',
+                       'Yp_stator':'Yp_stator_model_phi_psi_M2_Co',
+                       'Yp_rotor':'Yp_rotor_model_phi_psi_M2_Co',
+                       'loss_rat':'loss_rat_model_phi_psi_M2_Co'}
+   
+   derived_quantities = {'Al':(('Al2a','Al3'),
+                               lambda Al2a,Al3: np.array([np.zeros_like(Al2a),Al2a,Al3])),
+                         'stagger':(('stagger_stator','stagger_rotor'),
+                                    lambda stagger_stator,stagger_rotor: np.array([stagger_stator,stagger_rotor])),
+                         's_cx':(('s_cx_stator','s_cx_rotor'),
+                                 lambda s_cx_stator,s_cx_rotor: np.array([s_cx_stator,s_cx_rotor])),
+                         'Yp':(('Yp_stator','Yp_rotor'),
+                               lambda Yp_stator,Yp_rotor: np.array([Yp_stator,Yp_rotor])),
+                         'zeta':(('zeta_stator',),
+                                 lambda zeta_stator: np.array([zeta_stator,np.ones_like(zeta_stator)])),
+                         'beta':(('beta_rotor',),
+                                 lambda beta_rotor: [10.5*np.ones_like(beta_rotor),beta_rotor]),
+                         'eta':(('eta_lost',),
+                                lambda eta_lost: 100-100*eta_lost),
+                         'nondim':(('Al','zeta','eta_lost','loss_rat','phi','psi','M2','ga'),
+                                   nondim_mean_line)}
+   
+   def __init__(self,phi,psi,M2,Co,lazy=False):
       """_summary_
 
       Args:
@@ -1438,6 +2624,7 @@ class turbine:
           psi (_type_): _description_
           M2 (_type_): _description_
           Co (_type_): _description_
+          lazy (bool, optional): If True, nothing is evaluated until requested, e.g. with evaluate('eta'). Defaults to False.
       """
       
       if np.isscalar(phi) and np.isscalar(psi) and np.isscalar(M2) and np.isscalar(Co):
@@ -1481,7 +2668,92 @@ class turbine:
       self.Omega = 314.159
       self.Re = 2e6
       
-      self.get_nondim()
+      self._node_cache = {}
+      self._node_count = 0
+      
+      if lazy == False:
+         self.get_nondim()
+      
+   def evaluate(self,*quantities):
+      """Evaluate quantities in the dependency graph, reusing memoised values whose inputs are unchanged.
+
+      Surrogate models that can be evaluated at the same stage are predicted together in one batch.
+
+      Args:
+          quantities (str): Names of surrogate or derived quantities, e.g. 'eta', 'Al' or 'Yp_rotor'.
+
+      Returns:
+          Value of the quantity, or a tuple of values if more than one is requested.
+      """
+      
+      for quantity in quantities:
+         if (quantity not in self.surrogate_models) and (quantity not in self.derived_quantities):
+            sys.exit(f'{quantity} is not a quantity in the dependency graph')
+      
+      for stage in self._evaluation_stages(quantities):
+         stale_nodes = []
+         for node in stage:
+            dependency_keys = tuple([self._dependency_key(dependency) for dependency in self._dependencies(node)])
+            if (node not in self._node_cache) or (self._node_cache[node][0] != dependency_keys):
+               stale_nodes.append((node,dependency_keys))
+         
+         stale_surrogates = [(node,dependency_keys) for node,dependency_keys in stale_nodes if node in self.surrogate_models]
+         if len(stale_surrogates) > 0:
+            model_group = turbine_GPR_group([self.surrogate_models[node] for node,_ in stale_surrogates])
+            predictions = model_group.predict({variable:self._dependency_value(variable) for variable in model_group.variables})
+            for node,dependency_keys in stale_surrogates:
+               self._store_node(node,dependency_keys,predictions[node])
+            
+         for node,dependency_keys in stale_nodes:
+            if node in self.derived_quantities:
+               dependencies,function = self.derived_quantities[node]
+               self._store_node(node,dependency_keys,function(*[self._dependency_value(dependency) for dependency in dependencies]))
+      
+      if len(quantities) == 1:
+         return self._node_cache[quantities[0]][1]
+      else:
+         return tuple([self._node_cache[quantity][1] for quantity in quantities])
+      
+   def _dependencies(self,node):
+      if node in self.surrogate_models:
+         return model_registry.get(self.surrogate_models[node])['variables']
+      else:
+         return self.derived_quantities[node][0]
+   
+   def _evaluation_stages(self,quantities):
+      # group the required nodes by depth, so each stage only depends on earlier ones
+      depths = {}
+      def depth(node):
+         if node not in depths:
+            dependency_depths = [depth(dependency) for dependency in self._dependencies(node)
+                                 if (dependency in self.surrogate_models) or (dependency in self.derived_quantities)]
+            depths[node] = 1 + max(dependency_depths,default=0)
+         return depths[node]
+      
+      for quantity in quantities:
+         depth(quantity)
+      
+      stages = [[] for _ in range(max(depths.values()))]
+      for node,node_depth in depths.items():
+         stages[node_depth-1].append(node)
+      return stages
+   
+   def _dependency_key(self,dependency):
+      if dependency in self._node_cache:
+         return self._node_cache[dependency][2]
+      else:
+         value = np.asarray(getattr(self,dependency))
+         return (value.shape,value.dtype.str,value.tobytes())
+      
+   def _dependency_value(self,dependency):
+      if dependency in self._node_cache:
+         return self._node_cache[dependency][1]
+      else:
+         return getattr(self,dependency)
+   
+   def _store_node(self,node,dependency_keys,value):
+      self._node_count += 1
+      self._node_cache[node] = (dependency_keys,value,self._node_count)
 
    def get_Al(self):
       """_summary_
@@ -1489,24 +2761,9 @@ class turbine:
       Returns:
           _type_: _description_
       """
-   
-      Al2_model = turbine_GPR('Al2a_model_phi_psi_M2_Co')
-      Al3_model = turbine_GPR('Al3_model_phi_psi_M2_Co')
-      
-      Al1 = np.zeros(self.no_points)
-      Al2 = np.array(Al2_model.predict(pd.DataFrame(data={'phi':self.phi,
-                                                   'psi':self.psi,
-                                                   'M2':self.M2,
-                                                   'Co':self.Co}))['predicted_output'])
-      Al3 = np.array(Al3_model.predict(pd.DataFrame(data={'phi':self.phi,
-                                                   'psi':self.psi,
-                                                   'M2':self.M2,
-                                                   'Co':self.Co}))['predicted_output'])
-      self.Al1 = Al1
-      self.Al2 = Al2
-      self.Al3 = Al3
-      self.Al = np.array([Al1,Al2,Al3])
       
+      self.Al = self.evaluate('Al')
+      self.Al1,self.Al2,self.Al3 = self.Al
       return self.Al
 
    def get_stagger(self):
@@ -1516,20 +2773,8 @@ class turbine:
           _type_: _description_
       """
       
-      stagger_stator_model = turbine_GPR('stagger_stator_model_phi_psi_M2_Co')
-      stagger_rotor_model = turbine_GPR('stagger_rotor_model_phi_psi_M2_Co')
-      
-      stagger_stator = np.array(stagger_stator_model.predict(pd.DataFrame(data={'phi':self.phi,
-                                                                     'psi':self.psi,
-                                                                     'M2':self.M2,
-                                                                     'Co':self.Co}))['predicted_output'])
-      stagger_rotor = np.array(stagger_rotor_model.predict(pd.DataFrame(data={'phi':self.phi,
-                                                                     'psi':self.psi,
-                                                                     'M2':self.M2,
-                                                                     'Co':self.Co}))['predicted_output'])
-      self.stagger_stator = stagger_stator
-      self.stagger_rotor = stagger_rotor
-      self.stagger = np.array([stagger_stator,stagger_rotor])
+      self.stagger = self.evaluate('stagger')
+      self.stagger_stator,self.stagger_rotor = self.stagger
       return self.stagger
 
    def get_zeta(self):
@@ -1539,18 +2784,8 @@ class turbine:
           _type_: _description_
       """
       
-      zeta_stator_model = turbine_GPR('zeta_stator_model_phi_psi_M2_Co') #maybe improve this model
-      
-      zeta_stator = np.array(zeta_stator_model.predict(pd.DataFrame(data={'phi':self.phi,
-                                                   'psi':self.psi,
-                                                   'M2':self.M2,
-                                                   'Co':self.Co}))['predicted_output'])
-      zeta_rotor = np.ones(self.no_points)
-      
-      self.zeta_stator = zeta_stator
-      self.zeta_rotor = zeta_rotor
-      self.zeta = np.array([zeta_stator,zeta_rotor])
-      
+      self.zeta = self.evaluate('zeta')
+      self.zeta_stator,self.zeta_rotor = self.zeta
       return self.zeta
 
    def get_s_cx(self):
@@ -1560,22 +2795,8 @@ class turbine:
           _type_: _description_
       """
       
-      s_cx_stator_model = turbine_GPR('s_cx_stator_model_phi_psi_M2_Co')
-      s_cx_rotor_model = turbine_GPR('s_cx_rotor_model_phi_psi_M2_Co')
-      
-      s_cx_stator = np.array(s_cx_stator_model.predict(pd.DataFrame(data={'phi':self.phi,
-                                                   'psi':self.psi,
-                                                   'M2':self.M2,
-                                                   'Co':self.Co}))['predicted_output'])
-      s_cx_rotor = np.array(s_cx_rotor_model.predict(pd.DataFrame(data={'phi':self.phi,
-                                                   'psi':self.psi,
-                                                   'M2':self.M2,
-                                                   'Co':self.Co}))['predicted_output'])
-      
-      self.s_cx_stator = s_cx_stator
-      self.s_cx_rotor = s_cx_rotor
-      self.s_cx = np.array([s_cx_stator,s_cx_rotor])
-      
+      self.s_cx = self.evaluate('s_cx')
+      self.s_cx_stator,self.s_cx_rotor = self.s_cx
       return self.s_cx
    
    def get_loss_rat(self):
@@ -1585,16 +2806,7 @@ class turbine:
           _type_: _description_
       """
       
-      loss_rat_model = turbine_GPR('loss_rat_model_phi_psi_M2_Co')
-      
-      self.get_Yp()
-      
-      self.loss_rat = np.array(loss_rat_model.predict(pd.DataFrame(data={'phi':self.phi,
-                                                   'psi':self.psi,
-                                                   'Yp_stator':self.Yp_stator,
-                                                   'Yp_rotor':self.Yp_rotor,
-                                                   'Co':self.Co}))['predicted_output'])
-      
+      self.loss_rat = self.evaluate('loss_rat')
       return self.loss_rat
 
    def get_eta_lost(self):
@@ -1604,17 +2816,7 @@ class turbine:
           _type_: _description_
       """
       
-      eta_lost_model = turbine_GPR('eta_lost_model_phi_psi_M2_Co')
-      
-      self.get_Yp()
-      
-      self.eta_lost = np.array(eta_lost_model.predict(pd.DataFrame(data={'phi':self.phi,
-                                                   'psi':self.psi,
-                                                   'M2':self.M2,
-                                                   'Co':self.Co,
-                                                   'Yp_stator':self.Yp_stator,
-                                                   'Yp_rotor':self.Yp_rotor}))['predicted_output'])
-      
+      self.eta_lost,self.eta = self.evaluate('eta_lost','eta')
       return self.eta_lost
    
    def get_t_ps(self):
@@ -1648,24 +2850,8 @@ class turbine:
           _type_: _description_
       """
       
-      Yp_stator_model = turbine_GPR('Yp_stator_model_phi_psi_M2_Co')
-      Yp_rotor_model = turbine_GPR('Yp_rotor_model_phi_psi_M2_Co')
-      
-      self.get_stagger()
-      self.get_s_cx()
-      self.get_Al()
-      
-      Yp_stator = np.array(Yp_stator_model.predict(pd.DataFrame(data={'s_cx_stator':self.s_cx_stator,
-                                                                     'stagger_stator':self.stagger_stator,
-                                                                     'M2':self.M2,
-                                                                     'Al2a':self.Al2}))['predicted_output'])
-      Yp_rotor = np.array(Yp_rotor_model.predict(pd.DataFrame(data={'s_cx_rotor':self.s_cx_rotor,
-                                                                     'psi':self.psi,
-                                                                     'M2':self.M2,
-                                                                     'stagger_rotor':self.stagger_rotor}))['predicted_output'])
-      self.Yp_stator = Yp_stator
-      self.Yp_rotor = Yp_rotor
-      self.Yp = np.array([Yp_stator,Yp_rotor])
+      self.Yp = self.evaluate('Yp')
+      self.Yp_stator,self.Yp_rotor = self.Yp
       return self.Yp
    
    def get_beta(self):
@@ -1675,14 +2861,8 @@ class turbine:
           _type_: _description_
       """
       
-      beta_rotor_model = turbine_GPR('beta_rotor_model_phi_psi_M2_Co')
-      self.beta_rotor = np.array(beta_rotor_model.predict(pd.DataFrame(data={'phi':self.phi,
-                                                                           'psi':self.psi,
-                                                                           'M2':self.M2,
-                                                                           'Co':self.Co}))['predicted_output'])
-      
-      self.beta_stator = 10.5*np.ones(self.no_points)
-      self.beta = [self.beta_stator,self.beta_rotor]
+      self.beta = self.evaluate('beta')
+      self.beta_stator,self.beta_rotor = self.beta
       return self.beta
    
    def get_lean(self):
@@ -1736,91 +2916,20 @@ class turbine:
    def get_nondim(self):
       """_summary_
       """
-
-      Al = self.get_Al()
-      loss_ratio = self.get_loss_rat()
-      eta_lost = self.get_eta_lost()
-      self.Yp = self.get_Yp()
-      self.eta = 100-100*eta_lost
-      
-      zeta = self.get_zeta() #zeta rotor assumed=1.0
-      cosAl = np.cos(np.radians(Al))
-         
-      # Get non-dimensional velocities from definition of flow coefficient
-      Vx_U1,Vx_U2,Vx_U3 = self.phi*zeta[0], self.phi, self.phi*zeta[1]
-      Vx_U = np.array([Vx_U1,Vx_U2,Vx_U3])
-      Vt_U = Vx_U * np.tan(np.radians(Al))
-      V_U = np.sqrt(Vx_U ** 2.0 + Vt_U ** 2.0)
-
-      # Change reference frame for rotor-relative velocities and angles
-      Vtrel_U = Vt_U - 1.0
-      Vrel_U = np.sqrt(Vx_U ** 2.0 + Vtrel_U ** 2.0)
-      Alrel = np.degrees(np.arctan2(Vtrel_U, Vx_U))
-
-      # Use Mach number to get U/cpTo1
-      V_sqrtcpTo2 = compflow.V_cpTo_from_Ma(self.M2, self.ga)
-      U_sqrtcpTo1 = V_sqrtcpTo2 / V_U[1]
-      
-      Usq_cpTo1 = U_sqrtcpTo1 ** 2.0
-
-      # Non-dimensional temperatures from U/cpTo Ma and stage loading definition
-      cpTo1_Usq = 1.0 / Usq_cpTo1
-      cpTo2_Usq = cpTo1_Usq
-      cpTo3_Usq = (cpTo2_Usq - self.psi)
-
-      # Turbine
-      cpTo_Usq = np.array([cpTo1_Usq, cpTo2_Usq, cpTo3_Usq])
-      
-      # Mach numbers and capacity from compressible flow relations
-      Ma = compflow.Ma_from_V_cpTo(V_U / np.sqrt(cpTo_Usq), self.ga)
-      Marel = Ma * Vrel_U / V_U
-      Q = compflow.mcpTo_APo_from_Ma(Ma, self.ga)
-      Q_Q1 = Q / Q[0]
-
-      # Use polytropic effy to get entropy change
-      To_To1 = cpTo_Usq / cpTo_Usq[0]
-      Ds_cp = -(1.0 - 1.0 / (1.0 - eta_lost)) * np.log(To_To1[-1])
-
-      # Somewhat arbitrarily, split loss using loss ratio (default 0.5)
-      s_cp = np.vstack((np.zeros(self.no_points), loss_ratio, np.ones(self.no_points))) * Ds_cp
-
-      # Convert to stagnation pressures
-      Po_Po1 = np.exp((self.ga / (self.ga - 1.0)) * (np.log(To_To1) + s_cp))
-
-      # Account for cooling or bleed flows
-      mdot_mdot1 = 1.0
-
-      # Use definition of capacity to get flow area ratios
-      # Area ratios = span ratios because rm = const
-      Dr_Drin = mdot_mdot1 * np.sqrt(To_To1) / Po_Po1 / Q_Q1 * cosAl[0] / cosAl
-
-      # Evaluate some other useful secondary aerodynamic parameters
-      T_To1 = To_To1 / compflow.To_T_from_Ma(Ma, self.ga)
-      P_Po1 = Po_Po1 / compflow.Po_P_from_Ma(Ma, self.ga)
-      Porel_Po1 = P_Po1 * compflow.Po_P_from_Ma(Marel, self.ga)
-      
-      # Turbine
-      Lam = (T_To1[2] - T_To1[1]) / (T_To1[2] - T_To1[0])
-      
-      self.Al = Al
-      self.Alrel = Alrel
-      self.Ma = Ma
-      self.Marel =Marel
-      self.Ax_Ax1 = Dr_Drin
-      self.U_sqrtcpTo1 = U_sqrtcpTo1
-      self.Po_Po1 = Po_Po1
-      self.To_To1 = To_To1
-      self.Vt_U = Vt_U
-      self.Vtrel_U = Vtrel_U
-      self.V_U = V_U
-      self.Vrel_U = Vrel_U
-      self.P_Po1 = P_Po1
-      self.Porel_Po1 = Porel_Po1
-      self.T_To1 = T_To1
-      self.mdot_mdot1 = mdot_mdot1
-      self.Lam = Lam
       
+      # evaluate everything in one pass first, so that surrogates are predicted in batches
+      nondim = self.evaluate('nondim','stagger','s_cx','Yp','eta')[0]
+      
+      self.get_Al()
+      self.get_stagger()
       self.get_s_cx()
+      self.get_Yp()
+      self.get_loss_rat()
+      self.get_eta_lost()
+      self.get_zeta() #zeta rotor assumed=1.0
+      
+      for key,value in nondim.items():
+         setattr(self,key,value)
 
    def free_vortex_vane(self,rh,rc,rm):
       """Evaluate vane flow angles assuming a free vortex.
@@ -1954,18 +3063,20 @@ class turbine:
    def get_non_dim_geometry(self,
                            Omega=None,
                            To1=None,
-                           Po1=None):
+                           Po1=None,
+                           export_json=None):
       """_summary_
 
       Args:
           Omega (_type_, optional): _description_. Defaults to None.
           To1 (_type_, optional): _description_. Defaults to None.
           Po1 (_type_, optional): _description_. Defaults to None.
+          export_json (str or bool, optional): Path of a json file to also write the parameters to. True writes turbine_json/turbine_params.json in the package, as read by get_coordinates() without arguments. With several designs the design index is appended to the file name. Defaults to None.
+          
+      Returns:
+          list[dict]: Stage parameter set for each design, in the format of turbine_json/datum.json.
       """
       
-      if self.no_points > 1:
-         sys.exit('Currently only set up for one design at a time')
-      
       if (To1!=None) and (Po1!=None) and (Omega!=None):
          self.Omega = Omega
          self.To1 = To1
@@ -1973,7 +3084,8 @@ class turbine:
    
       
       #need to set up for dimensional geometry too, to do this just need to have inputs
-         
+      
+      self.get_Al()
       self.get_stagger()
       self.get_s_cx()
       self.get_t_ps()
@@ -1984,85 +3096,141 @@ class turbine:
       self.get_lean()
       self.get_beta()
       self.get_loss_rat()
-      
-      self.eta = 100 - 100*self.get_eta_lost()
-      
-      mean_line = {"phi": float(self.phi),
-                  "psi": float(self.psi),
-                  "Lam": float(self.Lambda),
-                  "Al1": float(self.Al1),
-                  "Ma2": float(self.M2),
-                  "eta": float(self.eta),
-                  "ga": float(self.ga),
-                  "loss_split": float(self.loss_rat),
-                  "fc": [0.0,
-                           0.0],
-                  "TRc": [0.5,
-                           0.5]
+      self.get_eta_lost()
+      
+      datum_json = datum_parameters()
+      
+      # surrogates have already been evaluated for every design in one batch, so only need to unpack them here
+      params = []
+      for i in range(self.no_points):
+         
+         mean_line = {"phi": float(self.phi[i]),
+                     "psi": float(self.psi[i]),
+                     "Lam": float(self.Lambda),
+                     "Al1": float(self.Al1[i]),
+                     "Ma2": float(self.M2[i]),
+                     "eta": float(self.eta[i]),
+                     "ga": float(self.ga),
+                     "loss_split": float(self.loss_rat[i]),
+                     "fc": [0.0,
+                              0.0],
+                     "TRc": [0.5,
+                              0.5]
+                     }
+         
+         bcond = {"To1": float(self.To1),
+                  "Po1": float(self.Po1),
+                  "rgas": float(self.Rgas),
+                  "Omega": float(self.Omega),
+                  "delta": float(self.delta)
                   }
+         
+         threeD = {"htr": float(self.htr),
+                  "Re": float(self.Re),
+                  "tau_c": 0.0,
+                  "Co": [float(self.Co[i]),
+                           float(self.Co[i])],
+                  "AR": list(self.AR)
+                  }
+         
+         sect_row_0 = {'tte':float(self.tte),
+                           'sect_0': {
+                                 'spf':float(self.spf_stator),
+                                 'stagger':float(self.stagger_stator[i]),
+                                 'recamber':[float(self.recamber_le_stator),
+                                             float(self.recamber_te_stator[i])],
+                                 'Rle':float(self.Rle_stator),
+                                 'beta':float(self.beta_stator[i]),
+                                 "thickness_ps": float(self.t_ps_stator[i]),
+                                 "thickness_ss": float(self.t_ss_stator[i]),
+                                 "max_thickness_location_ss": float(self.max_t_loc_ss_stator[i]),
+                                 "max_thickness_location_ps": float(self.max_t_loc_ps_stator[i]),
+                                 "lean": float(self.lean_stator[i])
+                                 }
+                           }
+         
+         sect_row_1 = {'tte':float(self.tte),
+                           'sect_0': {
+                                 'spf':float(self.spf_rotor),
+                                 'stagger':float(self.stagger_rotor[i]),
+                                 'recamber':[float(self.recamber_le_rotor),
+                                             float(self.recamber_te_rotor[i])],
+                                 'Rle':float(self.Rle_rotor),
+                                 'beta':float(self.beta_rotor[i]),
+                                 "thickness_ps": float(self.t_ps_rotor[i]),
+                                 "thickness_ss": float(self.t_ss_rotor[i]),
+                                 "max_thickness_location_ss": float(self.max_t_loc_ss_rotor[i]),
+                                 "max_thickness_location_ps": float(self.max_t_loc_ps_rotor[i]),
+                                 "lean": float(self.lean_rotor[i])
+                                 }
+                           }
+         
+         turbine_json = copy.deepcopy(datum_json)
+         turbine_json["mean-line"] = mean_line
+         turbine_json['bcond'] = bcond
+         turbine_json['3d'] = threeD
+         turbine_json['sect_row_0'] = sect_row_0
+         turbine_json['sect_row_1'] = sect_row_1
+         params.append(turbine_json)
+      
+      if export_json == True:
+         export_json = '/'.join((self.package_path, 'turbine_json', 'turbine_params.json'))
+      
+      if isinstance(export_json,str):
+         export_root,export_ext = os.path.splitext(export_json)
+         for i,turbine_json in enumerate(params):
+            if self.no_points == 1:
+               export_path = export_json
+            else:
+               export_path = f'{export_root}_{i}{export_ext}'
+            with open(export_path, 'w') as f:
+               json.dump(turbine_json,
+                           f, 
+                           indent=4)
+      
+      return params
+   
+   def get_stage_parameters(self,
+                            Omega=None,
+                            To1=None,
+                            Po1=None):
+      """Parameter sets for each design, built in memory and ready to pass to get_shape.
+
+      Args:
+          Omega (_type_, optional): _description_. Defaults to None.
+          To1 (_type_, optional): _description_. Defaults to None.
+          Po1 (_type_, optional): _description_. Defaults to None.
+
+      Returns:
+          list[StageParameterSet]: Stage parameter set for each design.
+      """
+      
+      return [StageParameterSet(turbine_json) for turbine_json in self.get_non_dim_geometry(Omega=Omega,
+                                                                                              To1=To1,
+                                                                                              Po1=Po1)]
+   
+   def get_blade_coordinates(self,
+                             Omega=None,
+                             To1=None,
+                             Po1=None,
+                             workers=1):
+      """Blade and annulus coordinates of every design.
+
+      Args:
+          Omega (_type_, optional): _description_. Defaults to None.
+          To1 (_type_, optional): _description_. Defaults to None.
+          Po1 (_type_, optional): _description_. Defaults to None.
+          workers (int, optional): Number of worker processes to generate the sections over. None uses one per CPU. Defaults to 1.
+
+      Returns:
+          list[tuple]: (nb, h, c, ps, ss) for each design, as returned by get_coordinates.
+      """
       
-      bcond = {"To1": float(self.To1),
-               "Po1": float(self.Po1),
-               "rgas": float(self.Rgas),
-               "Omega": float(self.Omega),
-               "delta": float(self.delta)
-               }
-      
-      threeD = {"htr": float(self.htr),
-               "Re": float(self.Re),
-               "tau_c": 0.0,
-               "Co": [float(self.Co),
-                        float(self.Co)],
-               "AR": self.AR
-               }
-      
-      sect_row_0 = {'tte':float(self.tte),
-                        'sect_0': {
-                              'spf':float(self.spf_stator),
-                              'stagger':float(self.stagger_stator),
-                              'recamber':[float(self.recamber_le_stator),
-                                          float(self.recamber_te_stator)],
-                              'Rle':float(self.Rle_stator),
-                              'beta':float(self.beta_stator),
-                              "thickness_ps": float(self.t_ps_stator),
-                              "thickness_ss": float(self.t_ss_stator),
-                              "max_thickness_location_ss": float(self.max_t_loc_ss_stator),
-                              "max_thickness_location_ps": float(self.max_t_loc_ps_stator),
-                              "lean": float(self.lean_stator)
-                              }
-                        }
-      
-      sect_row_1 = {'tte':float(self.tte),
-                        'sect_0': {
-                              'spf':float(self.spf_rotor),
-                              'stagger':float(self.stagger_rotor),
-                              'recamber':[float(self.recamber_le_rotor),
-                                          float(self.recamber_te_rotor)],
-                              'Rle':float(self.Rle_rotor),
-                              'beta':float(self.beta_rotor),
-                              "thickness_ps": float(self.t_ps_rotor),
-                              "thickness_ss": float(self.t_ss_rotor),
-                              "max_thickness_location_ss": float(self.max_t_loc_ss_rotor),
-                              "max_thickness_location_ps": float(self.max_t_loc_ps_rotor),
-                              "lean": float(self.lean_rotor)
-                              }
-                        }
-      
-      turbine_json_subfolder_path = '/'.join((self.package_path, 'turbine_json'))
-
-      with open(f'{turbine_json_subfolder_path}/datum.json') as f:
-         turbine_json = json.load(f)
-
-      turbine_json["mean-line"] = mean_line
-      turbine_json['bcond'] = bcond
-      turbine_json['3d'] = threeD
-      turbine_json['sect_row_0'] = sect_row_0
-      turbine_json['sect_row_1'] = sect_row_1
-      
-      with open(f'{turbine_json_subfolder_path}/turbine_params.json', 'w') as f:
-         json.dump(turbine_json,
-                     f, 
-                     indent=4)
+      params = self.get_stage_parameters(Omega=Omega,
+                                         To1=To1,
+                                         Po1=Po1)
+      
+      return get_shapes(params,workers=workers)
      
    def get_blade(self,
                  dimensions=2,
@@ -2074,26 +3242,51 @@ class turbine:
                  Po1=None,
                  show=True,
                  ax1=None,
-                 col=None):
+                 col=None,
+                 design=0,
+                 output_dir=None,
+                 in_memory=False):
+      """Plot the blade shapes in 2D, or export them as STL files in 3D.
+
+      Files are written to output_dir if given. If neither output_dir nor in_memory is given, a directory is chosen with a dialog box.
+
+      Args:
+          dimensions (int, optional): 2 for x-rt and x-r plots, 3 for stator and rotor STL files. Defaults to 2.
+          span_percent (int, optional): Span of the x-rt section. Defaults to 50.
+          stack (bool, optional): Put both plots on one figure. Defaults to True.
+          stack_ratios (list, optional): Height ratios of the stacked plots. Defaults to [2,3].
+          Omega (_type_, optional): _description_. Defaults to None.
+          To1 (_type_, optional): _description_. Defaults to None.
+          Po1 (_type_, optional): _description_. Defaults to None.
+          show (bool, optional): Show the figures. Defaults to True.
+          ax1 (_type_, optional): Axes for the x-rt plot when stack is False. Defaults to None.
+          col (str, optional): Line format of the x-rt plot. Defaults to None.
+          design (int, optional): Index of the design to use. Defaults to 0.
+          output_dir (str, optional): Directory to write the files to. Defaults to None.
+          in_memory (bool, optional): Return the output without writing any files or opening a dialog box. Defaults to False.
+
+      Returns:
+          tuple or dict: figures and axes in 2D, or STL file contents as bytes keyed by 'stator' and 'rotor' in 3D.
+      """
 
       if col==None:
          col='-b'
+         
+      if (not isinstance(design,(int,np.integer))) or (design<0) or (design>=self.no_points):
+         sys.exit(f'design must be an integer index less than {self.no_points}')
       
-      self.get_non_dim_geometry(Omega=Omega,
-                                To1=To1,
-                                Po1=Po1)
-      
-      nb, h, c, ps, ss = get_coordinates()  
+      params = self.get_stage_parameters(Omega=Omega,
+                                         To1=To1,
+                                         Po1=Po1)
       
-      print('Choose file directory')
-         
-
-      root = tk.Tk()
-      blades_subfolder_path = filedialog.askdirectory(parent=root,
-                                                   title="Browse File")
-      root.destroy()
+      nb, h, c, ps, ss = get_shape(params[design])
       
-      # blades_subfolder_path = '/'.join((chosen_directory, 'Blade_shapes'))
+      if output_dir is not None:
+         blades_subfolder_path = output_dir
+      elif in_memory:
+         blades_subfolder_path = None
+      else:
+         blades_subfolder_path = choose_directory()
       
       if dimensions in [2,'2D','2d',2.0,'two']:
          # Plot x_rt and x_r 2D plots
@@ -2160,12 +3353,9 @@ class turbine:
          
          if stack==True:
             fig.tight_layout()
-            if show==True:
-               plt.show()
-            else:
-               return fig,(ax2,ax1)
-            
-            fig.savefig(f'{blades_subfolder_path}/blades.pdf')
+            if blades_subfolder_path is not None:
+               fig.savefig(f'{blades_subfolder_path}/blades.pdf')
+            figs, axs = fig,(ax2,ax1)
          else:
             
             fig1.set_figheight(3)
@@ -2173,88 +3363,34 @@ class turbine:
             fig1.tight_layout()
             
             fig2.tight_layout()
-            if show==True:
-               plt.show()
-            else:
-               return (fig1,fig2),(ax1,ax2)
-            
-            if ax1==None:
-               pass
-            else:
-               fig1.tight_layout()
+            if blades_subfolder_path is not None:
                fig1.savefig(f'{blades_subfolder_path}/blades_x_rt.pdf')
-            fig2.savefig(f'{blades_subfolder_path}/blades_x_r.pdf')
-            
+               fig2.savefig(f'{blades_subfolder_path}/blades_x_r.pdf')
+            figs, axs = (fig1,fig2),(ax1,ax2)
             
+         if show==True:
+            plt.show()
          
+         return figs, axs
          
       elif dimensions in [3,'3D','3d',3.0,'three']:
          
+         stl_files = {}
          for irow in [0,1]:
-            vertices = np.array([]).reshape(0,3)
-            faces = np.array([],dtype=np.int64).reshape(0,3)
-            ri_len = len(ps[irow])
-            
-            for ri in range(ri_len):
-                  
-               sect_ps = ps[irow][ri]
-               x_ps, r_ps, t_ps = sect_ps.T
-               rt_ps = r_ps*t_ps
-               sect_ss = ss[irow][ri]
-               x_ss, r_ss, t_ss = sect_ss.T
-               rt_ss = r_ss*t_ss
-               x = np.concatenate((x_ps, np.flip(x_ss)), axis=None)
-               rt = np.concatenate((rt_ps, np.flip(rt_ss)), axis=None)
-               r = np.concatenate((r_ps, np.flip(r_ss)), axis=None)
-               vertices_i = np.column_stack((x,rt,r))
-               vertices = np.vstack([vertices,vertices_i])
-               n = len(x)
-               
-               if ri==0:
-                  faces_i = [0]*(n-1)
-                  for i in range(n-1):    
-                        faces_i[i] = [int(i+1),
-                                    int(n-1-i),
-                                    int(i)]
-
-                  faces_i = np.array(faces_i,dtype=np.int64)
-                  faces = np.vstack([faces,faces_i])
-                  
-               elif ri==ri_len-1:
-                  faces_i = [0]*(n-1)
-                  for i in range(n*ri,n*(ri+1)-1):    
-                        faces_i[i-n*ri] = [int(i+1),
-                                          int(n*ri-1-i),
-                                          int(i)]
-
-                  faces_i = np.array(faces_i,dtype=np.int64)
-                  faces = np.vstack([faces,faces_i])
-                  
-               else:
-                  faces_i = [0]*(n-1)*2
-                  for i in range(n*ri,n*(ri+1)-1):    
-                        faces_i[i-n*ri] = [int(i),
-                                          int(i+1-n),
-                                          int(i+1)]
-                        faces_i[i-n*(ri-1)-1] = [int(i),
-                                                int(i-n),
-                                                int(i+1-n)]    
-
-                  faces_i = np.array(faces_i,dtype=np.int64)
-                  faces = np.vstack([faces,faces_i])
-
-            # Create the mesh
-            turbine_blade = mesh.Mesh(np.zeros(faces.shape[0], dtype=mesh.Mesh.dtype))
-            for i, f in enumerate(faces):
-               for j in range(3):
-                  turbine_blade.vectors[i][j] = vertices[f[j],:]
+            vertices, faces = blade_surface(ps[irow],ss[irow])
 
             if irow == 0:
                blade='stator'
             elif irow == 1:
                blade='rotor'
 
-            turbine_blade.save(f'{blades_subfolder_path}/turbine_{blade}_blade.stl')
+            stl_files[blade] = stl_bytes(vertices,faces)
+            
+            if blades_subfolder_path is not None:
+               with open(f'{blades_subfolder_path}/turbine_{blade}_blade.stl','wb') as f:
+                  f.write(stl_files[blade])
+         
+         return stl_files
       
       else:
          sys.exit('dimensions must be 2 or 3')